@@ -2,22 +2,21 @@
 AIME Agent implementation using OpenAI directly.
 """
 
+import functools
 import os
 
+import httpx
+from cache import cache_get, cache_put
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
+from parallel import dispatch
 
-# Load environment variables
-load_dotenv()
+MODEL = "gpt-4"
+MAX_TOKENS = 2000
 
-
-def get_aime_agent():
-    """Create and return an AIME problem-solving agent."""
-
-    class AIMEAgent:
-        def __init__(self):
-            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            self.system_prompt = """You are an expert mathematician specializing in AIME (American Invitational Mathematics Examination) problems.
+# Sent verbatim as the first message of every request, so the API's automatic
+# prompt caching can reuse the shared prefix across problems
+SYSTEM_PROMPT = """You are an expert mathematician specializing in AIME (American Invitational Mathematics Examination) problems.
 
 CRITICAL: Your final answer MUST be a single integer between 0 and 999 (inclusive).
 
@@ -45,17 +44,82 @@ Remember:
 - Always verify your answer makes sense in the context of the problem
 """
 
-        def solve(self, problem):
+# Maximum number of in-flight requests when solving several problems at once
+DEFAULT_CONCURRENCY = 16
+
+# Connection pool sized for many concurrent completions over one keep-alive pool
+HTTP_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=64)
+
+
+@functools.cache
+def ensure_env():
+    """Load environment variables from .env once per process."""
+    load_dotenv()
+
+
+@functools.cache
+def get_client():
+    """Return the process-wide AsyncOpenAI client, creating it on first use."""
+    ensure_env()
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=httpx.AsyncClient(limits=HTTP_LIMITS))
+
+
+def get_aime_agent():
+    """Create and return an AIME problem-solving agent."""
+
+    class AIMEAgent:
+        def __init__(self):
+            self.client = get_client()
+            self.system_prompt = SYSTEM_PROMPT
+
+        def estimate_tokens(self, problem):
+            """Roughly estimate the tokens one request uses, at about 4 characters per token."""
+            return (len(self.system_prompt) + len(problem)) // 4 + MAX_TOKENS
+
+        def cache_key(self, problem):
+            """Return the response cache key for a problem."""
+            return f"{MODEL}|{self.system_prompt}|{problem}"
+
+        def request_body(self, problem):
+            """Return the chat completion parameters for a problem."""
+            return {
+                "model": MODEL,
+                "messages": [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": problem}],
+                "temperature": 0.1,
+                "max_tokens": MAX_TOKENS,
+            }
+
+        async def complete(self, problem):
+            """Request a completion for one problem; API errors propagate so they can be retried."""
+            return await self.client.chat.completions.create(**self.request_body(problem))
+
+        async def solve(self, problem):
             """Solve an AIME problem and return the answer."""
-            try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "system", "content": self.system_prompt}, {"role": "user", "content": problem}],
-                    temperature=0.1,
-                    max_tokens=2000,
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                return f"Error solving problem: {e!s}"
+            answers = await self.solve_many([problem])
+            return answers[0]
+
+        async def solve_many(self, problems, concurrency=DEFAULT_CONCURRENCY):
+            """Solve several AIME problems concurrently, returning answers in input order."""
+            cache_keys = [self.cache_key(problem) for problem in problems]
+            answers = [cache_get(key) for key in cache_keys]
+            pending = [i for i, answer in enumerate(answers) if answer is None]
+
+            # Rate-limited and retried on 429/5xx, so transient errors do not cost an answer
+            calls = [(functools.partial(self.complete, problems[i]), self.estimate_tokens(problems[i])) for i in pending]
+            results = await dispatch(calls, concurrency=concurrency)
+
+            for i, result in zip(pending, results, strict=True):
+                if isinstance(result, Exception):
+                    answers[i] = f"Error solving problem: {result!s}"
+                    continue
+                answers[i] = result.choices[0].message.content
+                cache_put(cache_keys[i], answers[i])
+
+            return answers
+
+        async def close(self):
+            """Close the shared HTTP connection pool; the next agent gets a fresh client."""
+            await self.client.close()
+            get_client.cache_clear()
 
     return AIMEAgent()
@@ -0,0 +1,80 @@
+"""
+Offline scoring through the OpenAI Batch API, at half the cost of live requests.
+"""
+
+import asyncio
+import logging
+
+import orjson
+from cache import cache_get, cache_put
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+POLL_INTERVAL = 30
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def write_batch_requests(file_path, bodies):
+    """Write one Batch API request line per (custom_id, body) pair."""
+    with open(file_path, "wb") as f:
+        for custom_id, body in bodies:
+            f.write(orjson.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}))
+            f.write(b"\n")
+
+
+async def read_batch_results(client, file_id):
+    """Return (custom_id, content, error) for every line of a batch output or error file."""
+    data = (await client.files.content(file_id)).content
+    results = []
+    for line in data.splitlines():
+        if not line:
+            continue
+        record = orjson.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            results.append((record["custom_id"], response["body"]["choices"][0]["message"]["content"], None))
+        else:
+            results.append((record["custom_id"], None, record.get("error") or response.get("body")))
+    return results
+
+
+async def solve_batch(agent, problems, requests_path):
+    """Solve problems with one Batch API job, returning responses in input order."""
+    answers = [cache_get(agent.cache_key(problem)) for problem in problems]
+    pending = {f"task-{i}": i for i, answer in enumerate(answers) if answer is None}
+    if not pending:
+        return answers
+
+    write_batch_requests(requests_path, [(custom_id, agent.request_body(problems[i])) for custom_id, i in pending.items()])
+
+    client = agent.client
+    with open(requests_path, "rb") as f:
+        batch_file = await client.files.create(file=f, purpose="batch")
+    batch = await client.batches.create(input_file_id=batch_file.id, endpoint=BATCH_ENDPOINT, completion_window="24h")
+    logger.info("Submitted batch %s with %d requests", batch.id, len(pending))
+
+    while batch.status not in TERMINAL_STATUSES:
+        await asyncio.sleep(POLL_INTERVAL)
+        batch = await client.batches.retrieve(batch.id)
+        logger.info("Batch %s status: %s", batch.id, batch.status)
+
+    if batch.status != "completed":
+        logger.error("Batch %s ended with status %s", batch.id, batch.status)
+
+    for i in pending.values():
+        answers[i] = f"Error solving problem: batch ended with status {batch.status}"
+
+    # Successful requests land in the output file and failed ones in the error file
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id is None:
+            continue
+        for custom_id, content, error in await read_batch_results(client, file_id):
+            i = pending[custom_id]
+            if content is None:
+                answers[i] = f"Error solving problem: {error}"
+                continue
+            answers[i] = content
+            cache_put(agent.cache_key(problems[i]), content)
+
+    return answers
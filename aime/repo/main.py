@@ -3,16 +3,19 @@ Simple AIME Agent - Main entry point for solving AIME mathematics problems.
 """
 
 import argparse
-import json
+import asyncio
 import logging
+import mmap
+import os
 import re
 import sys
 from pathlib import Path
 
-from agent import get_aime_agent
-from dotenv import load_dotenv
+import orjson
+from agent import ensure_env, get_aime_agent
+from batch import solve_batch
 
-load_dotenv()
+ensure_env()
 
 # Configure logging
 logging.basicConfig(
@@ -23,26 +26,29 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Keywords that introduce the answer, as in "answer: 123" or "final answer 456"
+_KEYWORDS = ("answer", "final answer", "result")
+# Separator and number, matched only at the position right after a keyword
+_SEPARATED_NUM = re.compile(r"[:\s]+(\d{1,3})")
+_ANY_NUM = re.compile(r"\b(\d{1,3})\b")
+
+
 def extract_answer(text):
     """Extract numerical answer from agent response."""
-    # Look for patterns like "answer is 123" or "final answer: 456"
-    patterns = [
-        r"answer[:\s]+(\d{1,3})",
-        r"final answer[:\s]+(\d{1,3})",
-        r"result[:\s]+(\d{1,3})",
-        r"\b(\d{1,3})\b(?!.*\b\d{1,3}\b)",  # Last number in text
-    ]
-
     text_lower = text.lower()
-    for pattern in patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            answer = int(match.group(1))
-            if 0 <= answer <= 999:
-                return answer
-
-    # Try to find any 3-digit or less number
-    numbers = re.findall(r"\b(\d{1,3})\b", text)
+    for keyword in _KEYWORDS:
+        # Locate the literal keyword with str.find and only run the regex where it occurs
+        index = text_lower.find(keyword)
+        while index != -1:
+            match = _SEPARATED_NUM.match(text_lower, index + len(keyword))
+            if match:
+                answer = int(match.group(1))
+                if 0 <= answer <= 999:
+                    return answer
+            index = text_lower.find(keyword, index + 1)
+
+    # Fall back to the last 3-digit or less number, found in a single linear scan
+    numbers = _ANY_NUM.findall(text)
     if numbers:
         # Return the last valid number found
         for num in reversed(numbers):
@@ -53,23 +59,74 @@ def extract_answer(text):
     return None
 
 
-def solve_aime_problem(agent, problem_text):
+def read_json(file_path):
+    """Parse a JSON file straight from a read-only memory map, without copying it into a bytes object."""
+    with open(file_path, "rb") as f:
+        # Empty files cannot be memory-mapped; let orjson report them as invalid JSON
+        if os.fstat(f.fileno()).st_size == 0:
+            return orjson.loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+def get_problem_text(task_data):
+    """Extract the problem text from a single task dictionary."""
+    if "task_input" in task_data:
+        return task_data["task_input"]
+    # Fallback to other possible field names
+    return task_data.get("problem", task_data.get("question", ""))
+
+
+async def solve_aime_problem(agent, problem_text):
     """Solve a single AIME problem using the agent."""
     logger.info("Invoking agent for AIME problem")
-    logger.info(f"Problem text length: {len(problem_text)} characters")
-    logger.debug(f"Problem: {problem_text[:200]}...")
+    logger.info("Problem text length: %d characters", len(problem_text))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Problem: %s...", problem_text[:200])
 
     # Run the agent
-    output = agent.solve(problem_text)
+    output = await agent.solve(problem_text)
     logger.info("Agent returned a response.")
-    logger.info(f"Raw LLM response length: {len(output)} characters")
-    logger.debug(f"Raw LLM response (first 500 chars): {output[:500]}...")
+    return parse_agent_output(output)
+
+
+async def solve_aime_problems(agent, problems):
+    """Solve several AIME problems concurrently using the agent."""
+    logger.info("Invoking agent for %d AIME problems", len(problems))
+
+    outputs = await agent.solve_many(problems)
+    logger.info("Agent returned all responses.")
+    return [parse_agent_output(output) for output in outputs]
+
+
+async def solve_aime_problems_batch(agent, problems, requests_path):
+    """Solve several AIME problems with one offline Batch API job."""
+    logger.info("Submitting %d AIME problems as a batch job", len(problems))
+
+    outputs = await solve_batch(agent, problems, requests_path)
+    logger.info("Batch job returned all responses.")
+    return [parse_agent_output(output) for output in outputs]
+
+
+async def run_and_close(agent, coro):
+    """Await an agent coroutine, then release the agent's HTTP connections."""
+    try:
+        return await coro
+    finally:
+        await agent.close()
+
+
+def parse_agent_output(output):
+    """Extract the numerical answer from a raw agent response."""
+    logger.info("Raw LLM response length: %d characters", len(output))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw LLM response (first 500 chars): %s...", output[:500])
 
     # Extract the numerical answer
     answer = extract_answer(output)
 
     if answer is not None:
-        logger.info(f"Extracted answer: {answer}")
+        logger.info("Extracted answer: %s", answer)
         return answer
     else:
         logger.error("Failed to extract a valid answer from the response.")
@@ -78,67 +135,109 @@ def solve_aime_problem(agent, problem_text):
 
 def write_output(file_path, answer):
     """Write the predicted answer to a JSON file."""
-    logger.info(f"Writing agent prediction to {file_path}")
+    logger.info("Writing agent prediction to %s", file_path)
     data = {"answer": answer}
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def write_batch_output(file_path, answers):
+    """Write the predicted answers for a batch of problems to a JSON file."""
+    logger.info("Writing %d agent predictions to %s", len(answers), file_path)
+    data = {"answers": answers}
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def solve_single_task(agent, task_data, task_file_path, output_file):
+    """Solve the problem in a single-task file and write its answer."""
+    problem_text = get_problem_text(task_data)
+
+    if not problem_text:
+        logger.error("No problem text found in task file")
+        sys.exit(1)
+
+    logger.info("Loaded problem: %s...", problem_text[:100])
+    print(f"Loaded AIME problem from {task_file_path}")
+    print("-" * 40)
+
+    answer = asyncio.run(run_and_close(agent, solve_aime_problem(agent, problem_text)))
+
+    if answer is not None:
+        write_output(output_file, answer)
+        print(f"\nAgent prediction: {answer}")
+        print(f"Result written to {output_file}")
+    else:
+        logger.warning("Agent did not produce a valid answer.")
+        print("\nFailed to get valid answer from agent")
+        # Write null answer
+        write_output(output_file, None)
+
+
+def solve_task_batch(agent, task_data, task_file_path, output_file, use_batch_api=False):
+    """Solve every problem in a multi-task file and write the answers.
+
+    Problems are sent concurrently, or as one Batch API job when use_batch_api is set.
+    """
+    problems = [get_problem_text(task) for task in task_data]
+
+    if not all(problems):
+        logger.error("No problem text found for some tasks in task file")
+        sys.exit(1)
+
+    logger.info("Loaded %d problems", len(problems))
+    print(f"Loaded {len(problems)} AIME problems from {task_file_path}")
+    print("-" * 40)
+
+    if use_batch_api:
+        coro = solve_aime_problems_batch(agent, problems, Path("batch_requests.jsonl"))
+    else:
+        coro = solve_aime_problems(agent, problems)
+    answers = asyncio.run(run_and_close(agent, coro))
+
+    write_batch_output(output_file, answers)
+    solved = sum(answer is not None for answer in answers)
+    print(f"\nAgent produced valid answers for {solved}/{len(answers)} problems")
+    print(f"Results written to {output_file}")
 
 
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="AIME agent for solving math problems")
     parser.add_argument("task_file", type=str, nargs="?", default="task.json", help="Path to a JSON file containing the AIME task (default: task.json)")
+    parser.add_argument("--batch", action="store_true", help="Solve a list of tasks with the OpenAI Batch API (half price, results within 24h)")
     args = parser.parse_args()
 
     logger.info("--- AIME Agent Run Started ---")
-    logger.info(f"Processing task file: {args.task_file}")
+    logger.info("Processing task file: %s", args.task_file)
 
     agent = get_aime_agent()
     task_file_path = Path(args.task_file)
 
     try:
         # Read task from JSON file
-        with open(task_file_path) as f:
-            task_data = json.load(f)
-
-        # Extract problem text from task_input field
-        if "task_input" in task_data:
-            problem_text = task_data["task_input"]
-        else:
-            # Fallback to other possible field names
-            problem_text = task_data.get("problem", task_data.get("question", ""))
-
-        if not problem_text:
-            logger.error("No problem text found in task file")
-            sys.exit(1)
-
-        logger.info(f"Loaded problem: {problem_text[:100]}...")
-        print(f"Loaded AIME problem from {task_file_path}")
-        print("-" * 40)
-
-        answer = solve_aime_problem(agent, problem_text)
+        task_data = read_json(task_file_path)
 
         output_file = Path("output.json")
-        if answer is not None:
-            write_output(output_file, answer)
-            print(f"\nAgent prediction: {answer}")
-            print(f"Result written to {output_file}")
+
+        # A list of tasks is solved concurrently as one batch
+        if isinstance(task_data, list):
+            solve_task_batch(agent, task_data, task_file_path, output_file, use_batch_api=args.batch)
         else:
-            logger.warning("Agent did not produce a valid answer.")
-            print("\nFailed to get valid answer from agent")
-            # Write null answer
-            write_output(output_file, None)
+            if args.batch:
+                logger.warning("--batch only applies to a list of tasks; solving the single task directly.")
+            solve_single_task(agent, task_data, task_file_path, output_file)
 
     except FileNotFoundError:
-        logger.error(f"Task file not found: {task_file_path}")
+        logger.error("Task file not found: %s", task_file_path)
         print(f"Error: Task file not found at '{task_file_path}'")
         sys.exit(1)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in task file: {e}")
+    except orjson.JSONDecodeError as e:
+        logger.error("Invalid JSON in task file: %s", e)
         print(f"Error: Invalid JSON in task file: {e}")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+        logger.error("An unexpected error occurred: %s", e, exc_info=True)
         print(f"An unexpected error occurred: {e}")
         sys.exit(1)
 
@@ -0,0 +1,96 @@
+"""
+Rate-limit-aware parallel dispatch of API calls, with retries on transient errors.
+
+Modeled on the OpenAI cookbook's api_request_parallel_processor: requests and tokens
+are budgeted per minute and the budgets refill continuously.
+"""
+
+import asyncio
+import logging
+import time
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPM = 3000
+DEFAULT_TPM = 150_000
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Rate limits, 5xx responses and dropped connections are worth retrying
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+
+class RateLimiter:
+    """Request and token budgets that refill at a fixed rate per minute."""
+
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.available_requests = rpm
+        self.available_tokens = tpm
+        self.last_update = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add the capacity earned since the last update, up to the per-minute limits."""
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.available_requests = min(self.rpm, self.available_requests + self.rpm * elapsed / 60)
+        self.available_tokens = min(self.tpm, self.available_tokens + self.tpm * elapsed / 60)
+        self.last_update = now
+
+    async def acquire(self, tokens):
+        """Wait until one request and the given number of tokens are available, then take them."""
+        # A single call larger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.tpm)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                # Sleep just long enough for the scarcer budget to cover this call
+                request_wait = (1 - self.available_requests) * 60 / self.rpm
+                token_wait = (tokens - self.available_tokens) * 60 / self.tpm
+                await asyncio.sleep(max(request_wait, token_wait, 0.001))
+
+    def settle(self, estimated_tokens, used_tokens):
+        """Correct the token budget once a call reports how many tokens it actually used."""
+        self.available_tokens = min(self.tpm, self.available_tokens + estimated_tokens - used_tokens)
+
+
+async def dispatch(calls, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_attempts=DEFAULT_MAX_ATTEMPTS, concurrency=None):
+    """Run API calls in parallel within rate limits, returning their results in input order.
+
+    Each entry of calls is a (call, estimated_tokens) pair, where call is a zero-argument
+    coroutine function. A call that keeps failing, or fails with a non-retryable error,
+    has its exception returned in place of a result.
+    """
+    limiter = RateLimiter(rpm, tpm)
+    semaphore = asyncio.Semaphore(concurrency or max(len(calls), 1))
+
+    async def run_one(call, estimated_tokens):
+        for attempt in range(max_attempts):
+            try:
+                async with semaphore:
+                    await limiter.acquire(estimated_tokens)
+                    result = await call()
+            except RETRYABLE_ERRORS as e:
+                if attempt == max_attempts - 1:
+                    logger.error("Giving up after %s attempts: %s", max_attempts, e)
+                    return e
+                delay = 2**attempt
+                logger.warning("Transient API error (%s), retrying in %ss (attempt %s/%s)", type(e).__name__, delay, attempt + 1, max_attempts)
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                return e
+
+            usage = getattr(result, "usage", None)
+            if usage is not None:
+                limiter.settle(estimated_tokens, usage.total_tokens)
+            return result
+
+    return await asyncio.gather(*(run_one(call, estimated_tokens) for call, estimated_tokens in calls))
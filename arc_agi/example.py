@@ -9,15 +9,95 @@ This script demonstrates the task injection format by:
 """
 
 import asyncio
-import json
-import os
-import subprocess
 import sys
 from pathlib import Path
 
+import numpy as np
+import orjson
 from benchmarks.benchmarks.arc_agi import ARCAGIBenchmark
 from benchmarks.core.base_benchmark import Split
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; without it every grid pair is compared with NumPy
+    njit = None
+
+REPO_DIR = Path(__file__).parent / "repo"
+
+
+def load_arc_runner():
+    """Import the agent's in-process entry point from the repo directory."""
+    # The repo uses script-style flat imports, so its directory must be importable
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+    from main import run
+
+    return run
+
+
+# Above this many test cases, grids are compared in one compiled pass
+BULK_EVAL_THRESHOLD = 8
+
+
+def as_grid(grid):
+    """Convert a grid to a contiguous int8 array, or None if it is not a valid grid."""
+    try:
+        return np.asarray(grid, dtype=np.int8)
+    except (ValueError, TypeError, OverflowError):
+        # Ragged or non-integer predictions can never match a valid grid
+        return None
+
+
+def grids_equal(pred, expected):
+    """Compare two grids as contiguous int8 arrays."""
+    pred_array = as_grid(pred)
+    expected_array = as_grid(expected)
+    if pred_array is None or expected_array is None:
+        return False
+
+    # Check shapes first so mismatched rectangles are rejected instead of broadcast
+    return pred_array.shape == expected_array.shape and np.array_equal(pred_array, expected_array)
+
+
+def _match_flags(preds_flat, exps_flat, offsets):
+    """Flag each grid whose cells all match; grid i spans offsets[i]:offsets[i + 1] of both buffers."""
+    n = len(offsets) - 1
+    flags = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        equal = True
+        for j in range(offsets[i], offsets[i + 1]):
+            if preds_flat[j] != exps_flat[j]:
+                equal = False
+                break
+        flags[i] = equal
+    return flags
+
+
+if njit is not None:
+    _match_flags = njit(cache=True)(_match_flags)
+
+
+def bulk_grids_equal(predictions, ground_truth):
+    """Compare many grid pairs at once by flattening them into shared int8 buffers."""
+    matches = np.zeros(len(ground_truth), dtype=np.bool_)
+    pred_cells, expected_cells, indices = [], [], []
+
+    for i, (pred, expected) in enumerate(zip(predictions, ground_truth, strict=False)):
+        pred_array = as_grid(pred)
+        expected_array = as_grid(expected)
+        # Only pairs with identical shapes can match, so only those are packed
+        if pred_array is not None and expected_array is not None and pred_array.shape == expected_array.shape:
+            pred_cells.append(pred_array.ravel())
+            expected_cells.append(expected_array.ravel())
+            indices.append(i)
+
+    if indices:
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum([cells.size for cells in pred_cells], out=offsets[1:])
+        matches[indices] = _match_flags(np.concatenate(pred_cells), np.concatenate(expected_cells), offsets)
+
+    return matches
+
 
 def evaluate_predictions(predictions, ground_truth):
     """Compare predicted grids with ground truth."""
@@ -29,9 +109,14 @@ def evaluate_predictions(predictions, ground_truth):
         print(f"Evaluation failed: Mismatched number of test cases (Expected {len(ground_truth)}, Got {len(predictions)}).")
         return 0.0
 
+    if njit is not None and len(predictions) > BULK_EVAL_THRESHOLD:
+        matches = bulk_grids_equal(predictions, ground_truth)
+    else:
+        matches = [grids_equal(pred, expected) for pred, expected in zip(predictions, ground_truth, strict=False)]
+
     correct_count = 0
-    for i, (pred, expected) in enumerate(zip(predictions, ground_truth, strict=False)):
-        if pred == expected:
+    for i, is_match in enumerate(matches):
+        if is_match:
             correct_count += 1
             print(f"  - Test case {i + 1}: Correct")
         else:
@@ -75,39 +160,37 @@ async def run_arc_agent(task_info, ground_truth_outputs, demo_pairs):
         "test": [{"input": test_input} for test_input in task_info["test_inputs"]],
     }
 
-    repo_dir = Path(__file__).parent / "repo"
-    task_file = repo_dir / "task.json"
+    task_file = REPO_DIR / "task.json"
     print(f"\n2. Saving task for agent to: {task_file}")
-    with open(task_file, "w") as f:
-        json.dump(task_for_agent, f, indent=2)
+    with open(task_file, "wb") as f:
+        f.write(orjson.dumps(task_for_agent, option=orjson.OPT_INDENT_2))
     print(f"   - Task file created with {len(task_for_agent['train'])} training pairs and {len(task_for_agent['test'])} test inputs.")
 
     # 3. Run the agent
     print("\n3. Running ARC agent on the task file...")
     print("-" * 40)
 
-    original_dir = os.getcwd()
+    # Run in-process so the interpreter and agent libraries are only loaded once
+    run_arc_task_file = load_arc_runner()
+    output_file = None
     try:
-        os.chdir(repo_dir)
-        result = subprocess.run([sys.executable, "main.py", "task.json"], capture_output=True, text=True, check=False)
-
-        print(result.stdout)
-        if result.stderr:
-            print("Errors:", result.stderr)
-
-    finally:
-        os.chdir(original_dir)
+        output_file = await run_arc_task_file(task_file.resolve())
+    except Exception as e:
+        print("Errors:", e)
     print("-" * 40)
 
-    # 4. Evaluate the agent's output
+    # 4. Evaluate the agent's output. Only the file this run reports is scored, never an
+    # output.json left over from an earlier task; a failed run counts as a miss
     print("\n4. Evaluating agent's predictions...")
-    output_file = repo_dir / "output.json"
-    if not output_file.exists():
-        print(f"Error: Output file '{output_file}' not found. The agent might have failed.")
+    if output_file is None:
+        print("Error: The agent did not produce an output file for this task.")
+        print("\nFinal Score: 0.00")
         return
 
-    with open(output_file) as f:
-        predictions = json.load(f)
+    # The repo directory is importable once load_arc_runner has run
+    from task_utils import read_json
+
+    predictions = read_json(output_file)
 
     score = evaluate_predictions(predictions, ground_truth_outputs)
     print(f"\nFinal Score: {score:.2f}")
@@ -0,0 +1,15 @@
+# cython: language_level=3
+"""
+Compiled grid formatter used by formatting.py when it has been built.
+
+Build in place with: cythonize -i _format_grid.pyx
+"""
+
+
+cpdef str format_rows(rows):
+    """Format grid rows of small integers as space-separated lines."""
+    cdef list lines = []
+    cdef long cell
+    for row in rows:
+        lines.append(" ".join([str(cell) for cell in row]))
+    return "\n".join(lines)
@@ -4,11 +4,9 @@ Simple ARC Agent - Minimal agent for solving ARC-AGI tasks.
 
 from agents import Agent
 
-# Simple ARC solver agent
-arc_agent = Agent(
-    name="arc_solver",
-    model="gpt-4.1-mini",
-    instructions="""You are a top-tier ARC-AGI solver. Your goal is to analyze abstract puzzles and output the solution grid.
+# Fixed instructions, so every request starts with the same prefix and the API's
+# automatic prompt caching can reuse it across tasks
+INSTRUCTIONS = """You are a top-tier ARC-AGI solver. Your goal is to analyze abstract puzzles and output the solution grid.
 
 Analyze the demonstration pairs to find the transformation rule. Apply that rule to the test inputs.
 
@@ -19,7 +17,13 @@ For example:
 </answer>
 
 Do NOT include any other text inside the <answer> tags. The JSON should be the only content.
-""",
+"""
+
+# Simple ARC solver agent
+arc_agent = Agent(
+    name="arc_solver",
+    model="gpt-4.1-mini",
+    instructions=INSTRUCTIONS,
     tools=[],  # No external tools needed
 )
 
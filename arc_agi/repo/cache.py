@@ -0,0 +1,48 @@
+"""
+On-disk cache for LLM responses, keyed by a hash of the full request.
+
+Caching is opt-in: set LLM_CACHE=1 to reuse responses for identical prompts.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent / ".llm_cache"
+
+
+def cache_enabled():
+    """Return True when response caching is switched on."""
+    return os.getenv("LLM_CACHE") == "1"
+
+
+def _cache_path(key):
+    """Map a cache key to its file in the cache directory."""
+    return CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+def cache_get(key):
+    """Return the cached response for a key, or None on a miss."""
+    if not cache_enabled():
+        return None
+
+    path = _cache_path(key)
+    if not path.exists():
+        return None
+
+    logger.info("LLM cache hit: %s", path.name)
+    return orjson.loads(path.read_bytes())
+
+
+def cache_put(key, value):
+    """Store a response under a key."""
+    if not cache_enabled():
+        return
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    _cache_path(key).write_bytes(orjson.dumps(value))
@@ -2,27 +2,54 @@
 Utilities for formatting ARC tasks into prompts.
 """
 
+import functools
+
+import numpy as np
+
+try:
+    from _format_grid import format_rows
+except ImportError:  # the compiled formatter is optional; build it with `cythonize -i _format_grid.pyx`
+
+    def format_rows(rows):
+        """Format grid rows of small integers as space-separated lines."""
+        return "\n".join(" ".join(map(str, row)) for row in rows)
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_grid_tuple(grid_tuple):
+    """Format a hashable grid; demo grids repeat across runs, so results are cached."""
+    return format_rows(grid_tuple)
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_int8_grid(shape, data):
+    """Format an int8 grid from its shape and raw cell bytes."""
+    return format_rows(np.frombuffer(data, dtype=np.int8).reshape(shape).tolist())
+
 
 def format_grid(grid):
     """Format a grid for display."""
-    return "\n".join(" ".join(str(cell) for cell in row) for row in grid)
+    if isinstance(grid, np.ndarray):
+        # Keyed on the cell bytes rather than the array, so equal grids share one entry
+        return _format_int8_grid(grid.shape, grid.astype(np.int8, copy=False).tobytes())
+    return _format_grid_tuple(tuple(tuple(row) for row in grid))
 
 
 def format_task_for_agent(demo_pairs, test_inputs):
     """Format ARC task for the agent."""
-    prompt = "Analyze these input/output demonstration pairs and find the pattern:\n\n"
+    parts = ["Analyze these input/output demonstration pairs and find the pattern:\n\n"]
 
     for i, pair in enumerate(demo_pairs):
-        prompt += f"Demo {i + 1}:\n"
-        prompt += f"Input:\n{format_grid(pair['input'])}\n"
-        prompt += f"Output:\n{format_grid(pair['output'])}\n\n"
+        parts.append(f"Demo {i + 1}:\n")
+        parts.append(f"Input:\n{format_grid(pair['input'])}\n")
+        parts.append(f"Output:\n{format_grid(pair['output'])}\n\n")
 
-    prompt += "Now apply the same transformation to these test inputs:\n\n"
+    parts.append("Now apply the same transformation to these test inputs:\n\n")
 
     for i, test_input in enumerate(test_inputs):
-        prompt += f"Test {i + 1}:\n{format_grid(test_input)}\n\n"
+        parts.append(f"Test {i + 1}:\n{format_grid(test_input)}\n\n")
 
-    prompt += """Please provide your answer as a JSON array of grids. Each grid should be a 2D array of integers.
-Example format: [[[1,2],[3,4]], [[5,6],[7,8]]] for two test outputs."""
+    parts.append("""Please provide your answer as a JSON array of grids. Each grid should be a 2D array of integers.
+Example format: [[[1,2],[3,4]], [[5,6],[7,8]]] for two test outputs.""")
 
-    return prompt
+    return "".join(parts)
@@ -4,16 +4,19 @@ Simple ARC Agent - Main entry point for running ARC-AGI tasks.
 
 import argparse
 import asyncio
-import json
 import logging
+import re
 import sys
 from pathlib import Path
 
+import orjson
 from agent import get_arc_agent
 from agents import Runner
+from cache import cache_get, cache_put
 from dotenv import load_dotenv
 from formatting import format_task_for_agent
-from task_utils import load_task_from_file
+from openai.types.responses import ResponseTextDeltaEvent
+from task_utils import load_task_from_file, to_int8_grids
 
 load_dotenv()
 
@@ -25,24 +28,81 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+ANSWER_END_TAG = "</answer>"
+_BRACKETS = re.compile(r"[\[\]]")
+
+
+def find_json_array(text):
+    """Return the first JSON array in text, parsed, or None.
+
+    The whole text is tried first. Otherwise one pass over the bracket characters tracks
+    the nesting depth, and only spans whose closing bracket returns it to zero are parsed.
+    Those spans never overlap, so malformed or very long responses cost linear time.
+    """
+    try:
+        value = orjson.loads(text.strip())
+        if isinstance(value, list):
+            return value
+    except orjson.JSONDecodeError:
+        pass
+
+    open_positions = []
+    for match in _BRACKETS.finditer(text):
+        if match.group() == "[":
+            open_positions.append(match.start())
+        elif open_positions:
+            start = open_positions.pop()
+            if not open_positions:
+                try:
+                    return orjson.loads(text[start : match.end()])
+                except orjson.JSONDecodeError:
+                    pass
+
+    return None
+
+
+async def stream_agent_output(agent, prompt):
+    """Stream the agent's response, stopping as soon as the closing answer tag arrives."""
+    result = Runner.run_streamed(agent, prompt)
+    chunks = []
+    tail = ""
+
+    async for event in result.stream_events():
+        if event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+            continue
+
+        chunks.append(event.data.delta)
+
+        # The tag may be split across deltas, so check it against the end of the previous delta
+        window = tail + event.data.delta
+        if ANSWER_END_TAG in window:
+            logger.info("Closing answer tag received, cancelling the rest of the response.")
+            result.cancel()
+            break
+        tail = window[-(len(ANSWER_END_TAG) - 1) :]
+
+    return "".join(chunks)
+
 
 async def solve_arc_task(agent, task_name, demo_pairs, test_inputs):
     """Solve a single ARC task using the agent."""
-    logger.info(f"Invoking agent for task: '{task_name}'")
+    logger.info("Invoking agent for task: '%s'", task_name)
 
     # Format the task for the agent
     prompt = format_task_for_agent(demo_pairs, test_inputs)
-    logger.debug(f"Formatted prompt for agent:\n{prompt}")
-
-    # Run the agent
-    result = await Runner.run(agent, prompt)
-    output = result.final_output
+    logger.debug("Formatted prompt for agent:\n%s", prompt)
+
+    # Run the agent, reading only up to the end of the answer
+    cache_key = f"{agent.model}|{agent.instructions}|{prompt}"
+    output = cache_get(cache_key)
+    if output is None:
+        output = await stream_agent_output(agent, prompt)
+        cache_put(cache_key, output)
     logger.info("Agent returned a response.")
-    logger.info(f"Raw LLM response length: {len(output)} characters")
-    logger.info(f"Raw LLM response (first 500 chars): {output[:500]}...")
+    logger.info("Raw LLM response length: %d characters", len(output))
+    logger.info("Raw LLM response (first 500 chars): %s...", output[:500])
 
     # Parse the agent's response to extract grids
-    json_candidate = ""
     try:
         logger.info("Looking for JSON within <answer> tags...")
 
@@ -53,16 +113,17 @@ async def solve_arc_task(agent, task_name, demo_pairs, test_inputs):
             return None
 
         content = parts[1].split("</answer>")[0]
-        json_candidate = content.strip()
 
-        logger.info(f"Extracted JSON candidate: {json_candidate[:200]}...")
-
-        # Try to parse it
-        grids = json.loads(json_candidate)
+        # Parse the first JSON array in it
+        grids = find_json_array(content)
+        if grids is None:
+            logger.error("No parseable JSON array found in the response.")
+            logger.error("Failed to parse: %s", content[:500])
+            return None
 
         # Validate structure
         if not isinstance(grids, list):
-            logger.error(f"JSON is not a list, but a {type(grids)}")
+            logger.error("JSON is not a list, but a %s", type(grids))
             return None
 
         if len(grids) == 0:
@@ -74,26 +135,50 @@ async def solve_arc_task(agent, task_name, demo_pairs, test_inputs):
             # Single grid format: [[1,2,3],[4,5,6]] -> [[[1,2,3],[4,5,6]]]
             grids = [grids]
         elif not (isinstance(grids[0], list) and len(grids[0]) > 0 and isinstance(grids[0][0], list)):
-            logger.error(f"Invalid grid structure: The first element is of type {type(grids[0])}")
+            logger.error("Invalid grid structure: The first element is of type %s", type(grids[0]))
             return None
 
-        logger.info(f"Successfully parsed {len(grids)} grid(s)")
+        logger.info("Successfully parsed %d grid(s)", len(grids))
         return grids
 
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parsing failed: {e}")
-        logger.error(f"Failed to parse: {json_candidate}")
-        return None
     except Exception as e:
-        logger.error(f"An unexpected error occurred during parsing: {e}", exc_info=True)
+        logger.error("An unexpected error occurred during parsing: %s", e, exc_info=True)
         return None
 
 
 def write_output(file_path, data):
     """Write the predicted output to a JSON file."""
-    logger.info(f"Writing agent predictions to {file_path}")
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
+    logger.info("Writing agent predictions to %s", file_path)
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+async def run(task_file_path):
+    """Solve the ARC task in a JSON file and write the predictions next to it.
+
+    Returns the path of the written output file, or None if the agent did not produce a valid output.
+    """
+    task_file_path = Path(task_file_path)
+    agent = get_arc_agent()
+
+    train_pairs, test_inputs = to_int8_grids(*load_task_from_file(task_file_path))
+
+    logger.info("Task '%s' loaded: %d training examples, %d test cases.", task_file_path.stem, len(train_pairs), len(test_inputs))
+    print(f"Loaded task with {len(train_pairs)} training examples and {len(test_inputs)} test cases")
+    print("-" * 40)
+
+    task_name = task_file_path.stem
+    predicted_outputs = await solve_arc_task(agent, task_name, train_pairs, test_inputs)
+
+    output_file = task_file_path.parent / "output.json"
+    if predicted_outputs:
+        write_output(output_file, predicted_outputs)
+        print(f"\nAgent predictions written to {output_file}")
+        return output_file
+
+    logger.warning("Agent did not produce a valid output.")
+    print("\nFailed to get valid output from agent")
+    return None
 
 
 async def main():
@@ -103,35 +188,19 @@ async def main():
     args = parser.parse_args()
 
     logger.info("--- ARC Agent Run Started ---")
-    logger.info(f"Processing task file: {args.task_file}")
+    logger.info("Processing task file: %s", args.task_file)
 
-    agent = get_arc_agent()
     task_file_path = Path(args.task_file)
 
     try:
-        train_pairs, test_inputs = load_task_from_file(task_file_path)
-
-        logger.info(f"Task '{task_file_path.stem}' loaded: {len(train_pairs)} training examples, {len(test_inputs)} test cases.")
-        print(f"Loaded task with {len(train_pairs)} training examples and {len(test_inputs)} test cases")
-        print("-" * 40)
-
-        task_name = task_file_path.stem
-        predicted_outputs = await solve_arc_task(agent, task_name, train_pairs, test_inputs)
-
-        output_file = task_file_path.parent / "output.json"
-        if predicted_outputs:
-            write_output(output_file, predicted_outputs)
-            print(f"\nAgent predictions written to {output_file}")
-        else:
-            logger.warning("Agent did not produce a valid output.")
-            print("\nFailed to get valid output from agent")
+        await run(task_file_path)
 
     except FileNotFoundError:
-        logger.error(f"Task file not found: {task_file_path}")
+        logger.error("Task file not found: %s", task_file_path)
         print(f"Error: Task file not found at '{task_file_path}'")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+        logger.error("An unexpected error occurred: %s", e, exc_info=True)
         print(f"An unexpected error occurred: {e}")
         sys.exit(1)
 
@@ -2,28 +2,48 @@
 Task utilities for loading ARC tasks and evaluating outputs.
 """
 
-import json
 import logging
+import mmap
+import os
+
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
+def read_json(file_path):
+    """Parse a JSON file straight from a read-only memory map, without copying it into a bytes object."""
+    with open(file_path, "rb") as f:
+        # Empty files cannot be memory-mapped; let orjson report them as invalid JSON
+        if os.fstat(f.fileno()).st_size == 0:
+            return orjson.loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
 def load_task_from_file(file_path):
     """Load an ARC task from a JSON file."""
-    logger.debug(f"Attempting to load task from {file_path}")
-    with open(file_path) as f:
-        data = json.load(f)
+    logger.debug("Attempting to load task from %s", file_path)
+    data = read_json(file_path)
 
     # Validate the format
     if "train" not in data or "test" not in data:
-        logger.error(f"Invalid task format in {file_path}: missing 'train' or 'test' keys.")
+        logger.error("Invalid task format in %s: missing 'train' or 'test' keys.", file_path)
         raise ValueError("Task file must contain 'train' and 'test' fields")
 
     # Extract train pairs and test inputs
     train_pairs = data["train"]
     test_inputs = [pair["input"] for pair in data["test"]]
 
-    logger.debug(f"Successfully loaded task from {file_path}")
+    logger.debug("Successfully loaded task from %s", file_path)
+    return train_pairs, test_inputs
+
+
+def to_int8_grids(train_pairs, test_inputs):
+    """Convert the grids of a loaded task to compact int8 arrays."""
+    train_pairs = [{"input": np.asarray(pair["input"], dtype=np.int8), "output": np.asarray(pair["output"], dtype=np.int8)} for pair in train_pairs]
+    test_inputs = [np.asarray(test_input, dtype=np.int8) for test_input in test_inputs]
     return train_pairs, test_inputs
 
 
@@ -43,5 +63,5 @@ def evaluate_against_expected(predicted_outputs, expected_outputs):
             explanations.append(f"Test {i + 1}: Incorrect")
 
     score = correct / len(expected_outputs)
-    logger.info(f"Evaluation result: {score:.2f} ({correct}/{len(expected_outputs)} correct)")
+    logger.info("Evaluation result: %.2f (%s/%d correct)", score, correct, len(expected_outputs))
     return score, " ".join(explanations)
@@ -2,13 +2,17 @@
 Utilities for formatting ARC tasks into prompts.
 """
 
+import numpy as np
+
 
 def format_grid(grid):
     """Format a grid for display as a Python list (multiline as a grid)."""
+    # Python ints, so rows print as [1, 2] rather than NumPy scalar reprs
+    rows = grid.tolist() if isinstance(grid, np.ndarray) else grid
     lines = []
     lines.append("[")
-    for i, row in enumerate(grid):
-        if i == len(grid) - 1:
+    for i, row in enumerate(rows):
+        if i == len(rows) - 1:
             lines.append(f"    {list(row)}")
         else:
             lines.append(f"    {list(row)},")
@@ -23,17 +27,17 @@ def format_pair_for_llm(pair):
 
 def format_task_for_agent(demo_pairs, test_inputs):
     """Format ARC task for the agent."""
-    prompt = "Analyze these input/output demonstration pairs and find the pattern:\n\n"
+    parts = ["Analyze these input/output demonstration pairs and find the pattern:\n\n"]
 
     for i, pair in enumerate(demo_pairs):
-        prompt += f"Demo {i + 1}:\n{format_pair_for_llm(pair)}\n\n"
+        parts.append(f"Demo {i + 1}:\n{format_pair_for_llm(pair)}\n\n")
 
-    prompt += "Now apply the same transformation to these test inputs:\n\n"
+    parts.append("Now apply the same transformation to these test inputs:\n\n")
 
     for i, test_input in enumerate(test_inputs):
-        prompt += f"Test {i + 1}:\n{format_grid(test_input.input)}\n\n"
+        parts.append(f"Test {i + 1}:\n{format_grid(test_input.input)}\n\n")
 
-    prompt += """Please provide your answer as a JSON array of grids. Each grid should be a 2D array of integers.
-Example format: [[[1,2],[3,4]], [[5,6],[7,8]]] for two test outputs."""
+    parts.append("""Please provide your answer as a JSON array of grids. Each grid should be a 2D array of integers.
+Example format: [[[1,2],[3,4]], [[5,6],[7,8]]] for two test outputs.""")
 
-    return prompt
+    return "".join(parts)
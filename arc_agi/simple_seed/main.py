@@ -13,17 +13,23 @@ from dotenv import load_dotenv
 from formatting import format_task_for_agent
 from task_utils import load_task_from_file
 
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S",
-)
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (and unavailable on Windows); fall back to the default event loop
+    uvloop = None
+
 logger = logging.getLogger(__name__)
 
 
+def configure_logging():
+    """Configure logging for command-line runs; importing this module leaves logging untouched."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+
 async def solve_arc_task(demo_pairs, test_inputs):
     """Solve a single ARC task using the agent."""
 
@@ -31,10 +37,6 @@ async def solve_arc_task(demo_pairs, test_inputs):
     prompt = format_task_for_agent(demo_pairs, test_inputs)
     logger.debug(f"Formatted prompt for agent:\n{prompt}")
 
-    for pair in demo_pairs:
-        formatted_pair = format_pair_for_llm(pair)
-        pass
-
 
 def write_output(file_path, data):
     """Write the predicted output to a JSON file."""
@@ -49,6 +51,9 @@ async def main():
     parser.add_argument("task_file", type=str, nargs="?", default="task.json", help="Path to a JSON file containing an ARC task (default: task.json)")
     args = parser.parse_args()
 
+    load_dotenv()
+    configure_logging()
+
     logger.info("--- ARC Agent Run Started ---")
     logger.info(f"Processing task file: {args.task_file}")
 
@@ -84,4 +89,5 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(main())
@@ -2,53 +2,91 @@
 Task utilities for loading ARC tasks and evaluating outputs.
 """
 
-import json
 import logging
 from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
 @dataclass
 class Pair:
-    input: list[list[int]]
-    output: list[list[int]] | None
+    # Cell values are 0-9, so grids are held as compact int8 arrays
+    input: np.ndarray
+    output: np.ndarray | None
 
 
-def load_task_from_file(file_path):
-    """Load an ARC task from a JSON file."""
+def _read_task(file_path):
+    """Read and validate the raw task dictionary from a JSON file."""
     logger.debug(f"Attempting to load task from {file_path}")
-    with open(file_path) as f:
-        data = json.load(f)
+    data = orjson.loads(Path(file_path).read_bytes())
 
     # Validate the format
     if "train" not in data or "test" not in data:
         logger.error(f"Invalid task format in {file_path}: missing 'train' or 'test' keys.")
         raise ValueError("Task file must contain 'train' and 'test' fields")
 
+    logger.debug(f"Successfully loaded task from {file_path}")
+    return data
+
+
+def load_task_from_file(file_path):
+    """Load an ARC task from a JSON file."""
+    data = _read_task(file_path)
+
     # Extract train pairs and test inputs
-    train_pairs = [Pair(input=pair["input"], output=pair["output"]) for pair in data["train"]]
-    test_inputs = [Pair(input=pair["input"], output=None) for pair in data["test"]]
+    train_pairs = [Pair(input=np.asarray(pair["input"], dtype=np.int8), output=np.asarray(pair["output"], dtype=np.int8)) for pair in data["train"]]
+    test_inputs = [Pair(input=np.asarray(pair["input"], dtype=np.int8), output=None) for pair in data["test"]]
+
+    return train_pairs, test_inputs
+
+
+def load_task_from_file_raw(file_path):
+    """Load an ARC task as ((input, output), ...) train pairs and (input, ...) test inputs.
+
+    Skips building Pair objects, for bulk loading many tasks.
+    """
+    data = _read_task(file_path)
+
+    train_pairs = tuple((pair["input"], pair["output"]) for pair in data["train"])
+    test_inputs = tuple(pair["input"] for pair in data["test"])
 
-    logger.debug(f"Successfully loaded task from {file_path}")
     return train_pairs, test_inputs
 
 
-def evaluate_against_expected(predicted_outputs, expected_outputs):
-    """Evaluate predicted outputs against expected outputs."""
+def _shape(grid):
+    """Return a grid's (rows, columns) from its first row, without reading the cells."""
+    return (len(grid), len(grid[0]) if len(grid) else 0)
+
+
+def grids_equal(pred, expected):
+    """Compare two grids cell by cell in NumPy, rejecting mismatched shapes first."""
+    try:
+        if _shape(pred) != _shape(expected):
+            return False
+        return np.array_equal(np.asarray(pred, dtype=np.int8), np.asarray(expected, dtype=np.int8))
+    except (ValueError, TypeError, OverflowError):
+        # Ragged or non-integer predictions can never match a valid grid
+        return False
+
+
+def evaluate_against_expected(predicted_outputs, expected_outputs, verbose=True):
+    """Evaluate predicted outputs against expected outputs.
+
+    Returns the score and a per-test explanation; pass verbose=False to skip building
+    the explanation (it is then empty), e.g. when scoring many tasks.
+    """
     if not predicted_outputs or len(predicted_outputs) != len(expected_outputs):
         return 0.0, f"Expected {len(expected_outputs)} outputs, got {len(predicted_outputs) if predicted_outputs else 0}"
 
-    correct = 0
-    explanations = []
-
-    for i, (pred, expected) in enumerate(zip(predicted_outputs, expected_outputs, strict=False)):
-        if pred == expected:
-            correct += 1
-            explanations.append(f"Test {i + 1}: Correct!")
-        else:
-            explanations.append(f"Test {i + 1}: Incorrect")
+    matches = [grids_equal(pred, expected) for pred, expected in zip(predicted_outputs, expected_outputs, strict=False)]
+    correct = sum(matches)
 
     score = correct / len(expected_outputs)
     logger.info(f"Evaluation result: {score:.2f} ({correct}/{len(expected_outputs)} correct)")
-    return score, " ".join(explanations)
+    if not verbose:
+        return score, ""
+    return score, " ".join(f"Test {i + 1}: {'Correct!' if match else 'Incorrect'}" for i, match in enumerate(matches))
@@ -2,22 +2,18 @@
 GameOf24 Agent implementation using OpenAI directly.
 """
 
+import asyncio
+import functools
 import os
+import re
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-# Load environment variables
-load_dotenv()
-
-
-def get_gameof24_agent():
-    """Create and return a GameOf24 problem-solving agent."""
-
-    class GameOf24Agent:
-        def __init__(self):
-            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            self.system_prompt = """You are an expert at solving Game of 24 puzzles.
+# Static rules and worked examples, sent verbatim as the first message of every
+# request. Keeping it byte-stable and over 1024 tokens lets the API's automatic
+# prompt caching reuse it across puzzles.
+SYSTEM_PROMPT = """You are an expert at solving Game of 24 puzzles.
 
 CRITICAL: Your task is to use four given numbers and basic arithmetic operations (+, -, ×, ÷) to create an expression that equals 24.
 
@@ -35,26 +31,201 @@ Rules:
 - You can use parentheses to group operations
 - The result must equal exactly 24
 
+Useful strategies:
+- Look for a pair of intermediate values whose product is 24: 1 × 24, 2 × 12, 3 × 8 or 4 × 6
+- Look for a pair whose sum or difference is 24, such as 20 + 4, 18 + 6, 12 + 12 or 30 - 6
+- Division can produce a fraction that a later step turns back into an integer, e.g. 8 ÷ (1/3) = 24
+- Dividing a large product works too, e.g. 96 ÷ 4 = 24 or 72 ÷ 3 = 24
+- Before concluding that there is no solution, check every pair of numbers and every way of grouping them
+
+Worked examples:
+
+Numbers: 1, 2, 3, 4
+Step 1: 1 + 2 = 3
+Step 2: 3 + 3 = 6
+Step 3: 6 × 4 = 24
+<solution>(1 + 2 + 3) × 4 = 24</solution>
+
+Numbers: 6, 6, 6, 6
+Step 1: 6 + 6 = 12
+Step 2: 12 + 6 = 18
+Step 3: 18 + 6 = 24
+<solution>6 + 6 + 6 + 6 = 24</solution>
+
+Numbers: 1, 1, 2, 7
+Step 1: 1 + 2 = 3
+Step 2: 1 + 7 = 8
+Step 3: 3 × 8 = 24
+<solution>(1 + 2) × (1 + 7) = 24</solution>
+
+Numbers: 4, 7, 8, 8
+Step 1: 8 ÷ 8 = 1
+Step 2: 7 - 1 = 6
+Step 3: 6 × 4 = 24
+<solution>(7 - 8 ÷ 8) × 4 = 24</solution>
+
+Numbers: 4, 4, 10, 10
+Step 1: 10 × 10 = 100
+Step 2: 100 - 4 = 96
+Step 3: 96 ÷ 4 = 24
+<solution>(10 × 10 - 4) ÷ 4 = 24</solution>
+
+Numbers: 3, 3, 8, 8
+Step 1: 8 ÷ 3 = 8/3
+Step 2: 3 - 8/3 = 1/3
+Step 3: 8 ÷ 1/3 = 24
+<solution>8 ÷ (3 - 8 ÷ 3) = 24</solution>
+
+Numbers: 1, 5, 5, 5
+Step 1: 1 ÷ 5 = 1/5
+Step 2: 5 - 1/5 = 24/5
+Step 3: 24/5 × 5 = 24
+<solution>(5 - 1 ÷ 5) × 5 = 24</solution>
+
+Numbers: 3, 3, 7, 7
+Step 1: 3 ÷ 7 = 3/7
+Step 2: 3 + 3/7 = 24/7
+Step 3: 24/7 × 7 = 24
+<solution>(3 + 3 ÷ 7) × 7 = 24</solution>
+
+Numbers: 2, 5, 5, 10
+Step 1: 2 ÷ 10 = 1/5
+Step 2: 5 - 1/5 = 24/5
+Step 3: 24/5 × 5 = 24
+<solution>(5 - 2 ÷ 10) × 5 = 24</solution>
+
+Numbers: 1, 3, 4, 6
+Step 1: 3 ÷ 4 = 3/4
+Step 2: 1 - 3/4 = 1/4
+Step 3: 6 ÷ 1/4 = 24
+<solution>6 ÷ (1 - 3 ÷ 4) = 24</solution>
+
+Numbers: 2, 2, 2, 3
+Step 1: 2 × 2 = 4
+Step 2: 4 × 2 = 8
+Step 3: 8 × 3 = 24
+<solution>2 × 2 × 2 × 3 = 24</solution>
+
+Numbers: 3, 3, 3, 3
+Step 1: 3 × 3 = 9
+Step 2: 9 × 3 = 27
+Step 3: 27 - 3 = 24
+<solution>3 × 3 × 3 - 3 = 24</solution>
+
+Numbers: 2, 3, 4, 5
+Step 1: 5 + 3 = 8
+Step 2: 8 - 2 = 6
+Step 3: 6 × 4 = 24
+<solution>(5 + 3 - 2) × 4 = 24</solution>
+
+Numbers: 1, 2, 7, 7
+Step 1: 7 × 7 = 49
+Step 2: 49 - 1 = 48
+Step 3: 48 ÷ 2 = 24
+<solution>(7 × 7 - 1) ÷ 2 = 24</solution>
+
+Numbers: 1, 4, 5, 6
+Step 1: 5 ÷ 6 = 5/6
+Step 2: 1 - 5/6 = 1/6
+Step 3: 4 ÷ 1/6 = 24
+<solution>4 ÷ (1 - 5 ÷ 6) = 24</solution>
+
+Numbers: 1, 1, 1, 2
+The largest value reachable is (1 + 1 + 1) × 2 = 6, which is less than 24.
+<solution>No solution exists for these numbers</solution>
+
+Numbers: 1, 1, 1, 1
+The largest value reachable is (1 + 1) × (1 + 1) = 4, which is less than 24.
+<solution>No solution exists for these numbers</solution>
+
+Numbers: 1, 1, 1, 5
+The largest value reachable is (1 + 1 + 1) × 5 = 15, and no grouping reaches 24.
+<solution>No solution exists for these numbers</solution>
+
 Output format:
 - Show your solution as a clear mathematical expression
 - State your final answer as <solution>[expression] = 24</solution>
 - If no solution exists, state <solution>No solution exists for these numbers</solution>
 """
 
-        def solve(self, problem):
-            """Solve a GameOf24 problem and return the answer."""
-            try:
-                response = self.client.chat.completions.create(
+# Maximum number of in-flight requests per agent when puzzles are solved concurrently
+DEFAULT_CONCURRENCY = 16
+
+
+# One <answer id=N>...</answer> element per puzzle in a batched response
+_BATCH_ANSWER = re.compile(r"<answer id=(\d+)>(.*?)</answer>", re.S)
+
+
+@functools.cache
+def ensure_env():
+    """Load environment variables from .env once per process."""
+    load_dotenv()
+
+
+@functools.cache
+def get_client():
+    """Return the process-wide AsyncOpenAI client, creating it on first use."""
+    ensure_env()
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+class GameOf24Agent:
+    """Solves GameOf24 puzzles with the shared client, limiting concurrent requests."""
+
+    __slots__ = ("client", "semaphore")
+
+    system_prompt = SYSTEM_PROMPT
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY):
+        self.client = get_client()
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def solve(self, problem):
+        """Solve a GameOf24 problem and return the answer."""
+        try:
+            async with self.semaphore:
+                response = await self.client.chat.completions.create(
                     model="gpt-4.1",
                     messages=[
                         {"role": "system", "content": self.system_prompt},
                         {"role": "user", "content": problem},
                     ],
-                    temperature=0.1,
+                    temperature=0,
                     max_tokens=2000,
                 )
-                return response.choices[0].message.content
-            except Exception as e:
-                return f"Error solving problem: {e!s}"
+            return response.choices[0].message.content
+        except Exception as e:
+            return f"Error solving problem: {e!s}"
+
+    async def solve_batch(self, problems):
+        """Solve several GameOf24 problems in one request, returning one answer per problem."""
+        numbered = "\n".join(f"{i}. {problem}" for i, problem in enumerate(problems, start=1))
+        prompt = f"""Solve all {len(problems)} Game of 24 puzzles below.
+
+{numbered}
 
-    return GameOf24Agent()
+Respond with one answer per puzzle, in this format:
+<answers>
+<answer id=1>[expression] = 24</answer>
+<answer id=2>No solution</answer>
+</answers>"""
+        output = await self.solve(prompt)
+        if output.startswith("Error solving problem"):
+            return [output] * len(problems)
+
+        answers = [""] * len(problems)
+        for answer_id, answer in _BATCH_ANSWER.findall(output):
+            index = int(answer_id) - 1
+            if 0 <= index < len(problems):
+                answers[index] = answer.strip()
+        return answers
+
+    async def close(self):
+        """Close the shared HTTP connection pool; the next agent gets a fresh client."""
+        await self.client.close()
+        get_client.cache_clear()
+
+
+def get_gameof24_agent(concurrency=DEFAULT_CONCURRENCY):
+    """Create and return a GameOf24 problem-solving agent."""
+    return GameOf24Agent(concurrency)
@@ -3,49 +3,56 @@ Simple GameOf24 Agent - Main entry point for solving Game of 24 puzzles.
 """
 
 import argparse
-import json
+import asyncio
 import logging
 import re
 import sys
 from pathlib import Path
 
+import orjson
 from agent import get_gameof24_agent
-from dotenv import load_dotenv
+from solution_cache import cache_enabled, get_solutions, puzzle_key, put_solutions
 
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S",
-)
 logger = logging.getLogger(__name__)
 
 
+def configure_logging():
+    """Configure logging for command-line runs; importing this module leaves logging untouched."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+
+# Patterns like "solution is: expression = 24", compiled once at import. The keyword
+# phrases share one alternation so the text is scanned once; when several appear,
+# "solution is" beats "answer is", which beats "expression". The lookahead lets matches
+# overlap, so a lower-ranked match cannot swallow a higher-ranked keyword inside it
+_KEYWORD_RE = re.compile(r"(?=(?P<keyword>solution is|answer is|expression)[:\s]+(?P<expr>[^=]+)\s*=\s*24)", re.IGNORECASE)
+_KEYWORD_RANK = {"solution is": 0, "answer is": 1, "expression": 2}
+_NO_SOLUTION = re.compile(r"no solution", re.IGNORECASE)
+_EXPR_RE = re.compile(r"([0-9+\-×÷*/().\s]+)\s*=\s*24")
+
+
 def extract_answer(text):
     """Extract the solution expression from agent response."""
-    # Look for patterns like "solution is: expression = 24"
-    patterns = [
-        r"solution is[:\s]+([^=]+)\s*=\s*24",
-        r"answer is[:\s]+([^=]+)\s*=\s*24",
-        r"expression[:\s]+([^=]+)\s*=\s*24",
-    ]
-
-    text_lower = text.lower()
-    for pattern in patterns:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
-        if match:
-            solution = match.group(1).strip()
-            return solution
+    best_rank, solution = len(_KEYWORD_RANK), None
+    for match in _KEYWORD_RE.finditer(text):
+        rank = _KEYWORD_RANK[match.group("keyword").lower()]
+        if rank < best_rank:
+            best_rank, solution = rank, match.group("expr").strip()
+            if rank == 0:
+                break
+    if solution is not None:
+        return solution
 
     # Check if no solution exists
-    if "no solution" in text_lower:
+    if _NO_SOLUTION.search(text):
         return "No solution"
 
     # Try to find any expression that equals 24
-    expression_pattern = r"([0-9+\-×÷*/().\s]+)\s*=\s*24"
-    matches = re.findall(expression_pattern, text)
+    matches = _EXPR_RE.findall(text)
     if matches:
         # Return the last valid expression found
         return matches[-1].strip()
@@ -53,14 +60,21 @@ def extract_answer(text):
     return None
 
 
-def solve_gameof24_problem(agent, problem_text):
+async def solve_gameof24_problem(agent, problem_text, use_cache=False):
     """Solve a single GameOf24 problem using the agent."""
+    key = puzzle_key(problem_text)
+    if use_cache:
+        (cached,) = get_solutions([key])
+        if cached is not None:
+            logger.info(f"Using cached solution: {cached}")
+            return cached
+
     logger.info("Invoking agent for GameOf24 problem")
     logger.info(f"Problem text length: {len(problem_text)} characters")
     logger.debug(f"Problem: {problem_text[:200]}...")
 
     # Run the agent
-    output = agent.solve(problem_text)
+    output = await agent.solve(problem_text)
     logger.info("Agent returned a response.")
     logger.info(f"Raw LLM response length: {len(output)} characters")
     logger.info(f"Raw LLM response (first 500 chars): {output[:500]}...")
@@ -70,26 +84,84 @@ def solve_gameof24_problem(agent, problem_text):
 
     if answer is not None:
         logger.info(f"Extracted solution: {answer}")
+        if use_cache:
+            put_solutions({key: answer})
         return answer
     else:
         logger.error("Failed to extract a valid solution from the response.")
         return None
 
 
+async def solve_gameof24_problems(agent, problems, batch_size, use_cache=False):
+    """Solve many GameOf24 problems, sending batch_size puzzles per request."""
+    keys = [puzzle_key(problem) for problem in problems]
+    answers = get_solutions(keys) if use_cache else [None] * len(problems)
+    pending = [i for i, answer in enumerate(answers) if answer is None]
+
+    chunks = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+    logger.info(f"Invoking agent for {len(pending)} GameOf24 problems in {len(chunks)} requests")
+
+    outputs = await asyncio.gather(*(agent.solve_batch([problems[i] for i in chunk]) for chunk in chunks))
+    for chunk, chunk_outputs in zip(chunks, outputs, strict=True):
+        for i, output in zip(chunk, chunk_outputs, strict=True):
+            answers[i] = extract_answer(output)
+
+    if use_cache:
+        put_solutions({keys[i]: answers[i] for i in pending})
+    return answers
+
+
+def load_tasks(file_path):
+    """Load task strings from a JSONL file with one {"task": ...} object or string per line."""
+    tasks = []
+    with open(file_path) as f:
+        for line in f:
+            if line.strip():
+                task = orjson.loads(line)
+                tasks.append(task["task"] if isinstance(task, dict) else task)
+    return tasks
+
+
 def write_output(file_path, answer):
     """Write the predicted answer to a JSON file."""
     logger.info(f"Writing agent prediction to {file_path}")
     data = {"answer": answer}
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
 
-def main():
+def write_batch_output(file_path, answers):
+    """Write the predicted answers for a batch of problems to a JSON file."""
+    logger.info(f"Writing {len(answers)} agent predictions to {file_path}")
+    data = {"answers": answers}
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+async def run_tasks_file(agent, tasks_file, output_file, batch_size, use_cache=False):
+    """Solve every task in a JSONL file and write the answers in input order."""
+    problems = load_tasks(tasks_file)
+    print(f"Loaded {len(problems)} GameOf24 problems from {tasks_file}")
+    print("-" * 40)
+
+    try:
+        answers = await solve_gameof24_problems(agent, problems, batch_size, use_cache)
+    finally:
+        await agent.close()
+
+    write_batch_output(output_file, answers)
+    solved = sum(answer is not None for answer in answers)
+    print(f"\nAgent produced solutions for {solved}/{len(answers)} problems")
+    print(f"Results written to {output_file}")
+
+
+async def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="GameOf24 agent for solving puzzles")
     parser.add_argument(
         "task",
         type=str,
+        nargs="?",
         help="The GameOf24 task string (e.g., 'Use the numbers 2, 3, 8, 8 to make 24')",
     )
     parser.add_argument(
@@ -99,12 +171,29 @@ def main():
         default="output.json",
         help="Path to output JSON file (default: output.json)",
     )
+    parser.add_argument("--tasks", type=str, help="Path to a JSONL file of tasks to solve instead of a single task")
+    parser.add_argument("--batch-size", type=int, default=10, help="Number of puzzles sent per request with --tasks (default: 10)")
     args = parser.parse_args()
+    if args.task is None and args.tasks is None:
+        parser.error("either a task string or --tasks is required")
 
-    logger.info("--- GameOf24 Agent Run Started ---")
-    logger.info(f"Processing task: {args.task}")
+    configure_logging()
 
+    logger.info("--- GameOf24 Agent Run Started ---")
     agent = get_gameof24_agent()
+
+    if args.tasks:
+        logger.info(f"Processing tasks file: {args.tasks}")
+        try:
+            await run_tasks_file(agent, args.tasks, Path(args.output), args.batch_size, use_cache=cache_enabled())
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}", exc_info=True)
+            print(f"An unexpected error occurred: {e}")
+            sys.exit(1)
+        logger.info("--- GameOf24 Agent Run Finished ---")
+        return
+
+    logger.info(f"Processing task: {args.task}")
     problem_text = args.task
 
     try:
@@ -112,7 +201,10 @@ def main():
         print(f"GameOf24 problem: {problem_text}")
         print("-" * 40)
 
-        answer = solve_gameof24_problem(agent, problem_text)
+        try:
+            answer = await solve_gameof24_problem(agent, problem_text, use_cache=cache_enabled())
+        finally:
+            await agent.close()
 
         output_file = Path(args.output)
         if answer is not None:
@@ -134,4 +226,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Persistent cache of GameOf24 solutions, keyed by the puzzle's numbers.
+
+Game of 24 has only 715 distinct puzzles (multisets of four numbers from 1 to 13),
+and a solution does not depend on the order the numbers are given in, so the sorted
+numbers identify a puzzle regardless of how the task is phrased.
+
+Caching is opt-in: set LLM_CACHE=1 to reuse solutions. Only expressions that use exactly
+the puzzle's numbers and evaluate to 24 are stored.
+"""
+
+import ast
+import logging
+import operator
+import os
+import re
+import shelve
+from fractions import Fraction
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = Path(__file__).parent / ".solution_cache"
+
+_NUMBER = re.compile(r"\d+")
+# The target itself, as in "to make 24", is not one of the puzzle's numbers
+_TARGET = re.compile(r"\b(?:make|makes|equal|equals|=)\s*24\b", re.IGNORECASE)
+
+_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+def cache_enabled():
+    """Return True when solution caching is switched on."""
+    return os.getenv("LLM_CACHE") == "1"
+
+
+def puzzle_key(task):
+    """Return the canonical key for a task, or None if it does not contain exactly four numbers."""
+    numbers = _NUMBER.findall(_TARGET.sub(" ", task))
+    if len(numbers) != 4:
+        return None
+    return " ".join(str(number) for number in sorted(map(int, numbers)))
+
+
+def _evaluate(node, numbers):
+    """Evaluate an arithmetic expression tree exactly, collecting the numbers it uses."""
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_evaluate(node.left, numbers), _evaluate(node.right, numbers))
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        numbers.append(node.value)
+        return Fraction(node.value)
+    raise ValueError(f"unsupported expression element: {ast.dump(node)}")
+
+
+def is_valid_solution(key, expression):
+    """Return True if an expression uses exactly the numbers in key and evaluates to 24."""
+    numbers = []
+    try:
+        tree = ast.parse(expression.replace("×", "*").replace("÷", "/"), mode="eval")
+        value = _evaluate(tree.body, numbers)
+    except (SyntaxError, ValueError, ZeroDivisionError):
+        return False
+    return value == 24 and " ".join(map(str, sorted(numbers))) == key
+
+
+def get_solutions(keys):
+    """Return the cached solution for each key, or None on a miss or a None key."""
+    with shelve.open(str(CACHE_PATH)) as cache:
+        solutions = [cache.get(key) if key is not None else None for key in keys]
+    hits = sum(solution is not None for solution in solutions)
+    if hits:
+        logger.info(f"Solution cache hits: {hits}/{len(keys)}")
+    return solutions
+
+
+def put_solutions(solutions):
+    """Store solutions from a {key: solution} mapping, skipping None keys and anything but a correct solution."""
+    with shelve.open(str(CACHE_PATH)) as cache:
+        for key, solution in solutions.items():
+            if key is None or solution is None:
+                continue
+            if not is_valid_solution(key, solution):
+                logger.info(f"Not caching incorrect solution for {key}: {solution}")
+                continue
+            cache[key] = solution
@@ -4,93 +4,225 @@ Example script showing how to use the LongBench agent on real benchmark tasks.
 This script demonstrates running multiple LongBench tasks in parallel by:
 1. Loading tasks from the LongBench benchmark
 2. Sampling k random tasks
-3. Running the agent on multiple tasks in parallel using asyncio.gather
-4. Evaluating the results
+3. Running the agent on multiple tasks in parallel, with bounded concurrency,
+   evaluating each result as it arrives
+4. Summarizing the results
 """
 
 import argparse
 import asyncio
-import json
+import os
 import random
 import sys
 import time
+from dataclasses import dataclass
 from pathlib import Path
 
+import openai
+import orjson
 from benchmarks.benchmarks.longbench.longbench_benchmark import LongBenchBenchmark
 from benchmarks.core.base_benchmark import Split
 from multi_agent.genes.seed_agents.longbench.simple_tool_calling.agent import solve_longbench_task
 
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (and unavailable on Windows); fall back to the default event loop
+    uvloop = None
 
-async def run_agent_on_task(script_dir: Path, task_id: str, show_output: bool = True) -> dict:
-    """Run the agent on a single task asynchronously."""
+
+REPO_DIR = Path(__file__).parent / "repo"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Retries for a task that hits the provider's rate limit
+MAX_RATE_LIMIT_ATTEMPTS = 5
+LOG_READ_SIZE = 65536
+
+
+@dataclass(slots=True)
+class TaskResult:
+    """Outcome of running an agent on one task; failures carry an error instead of raising."""
+
+    task_id: str
+    success: bool
+    predicted_answer: str | None
+    return_code: int
+    error: str | None = None
+
+    @classmethod
+    def failed(cls, task_id: str, error: str) -> "TaskResult":
+        """Build the result of a task that raised or produced no answer."""
+        return cls(task_id, False, None, 1, error)
+
+
+async def with_rate_limit_backoff(run):
+    """Await run(), retrying with jittered exponential backoff when the provider rate-limits it."""
+    # litellm's RateLimitError subclasses the OpenAI one, so both agents are covered
+    for attempt in range(MAX_RATE_LIMIT_ATTEMPTS):
+        try:
+            return await run()
+        except openai.RateLimitError:
+            if attempt == MAX_RATE_LIMIT_ATTEMPTS - 1:
+                raise
+            delay = 2**attempt + random.random()
+            print(f"   Rate limited, retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+
+async def run_guarded(task_id: str, run_one) -> TaskResult:
+    """Run one task, turning an unexpected exception into a failed result."""
+    try:
+        return await run_one(task_id)
+    except Exception as e:
+        return TaskResult.failed(task_id, str(e))
+
+
+def read_output_file(file_path: Path) -> dict | None:
+    """Read an agent output file, or return None if the agent did not write one."""
+    try:
+        with open(file_path, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def add_repo_to_path():
+    """Make the repo directory importable; the repo uses script-style flat imports."""
+    if str(REPO_DIR) not in sys.path:
+        sys.path.insert(0, str(REPO_DIR))
+
+
+def load_repo_solver():
+    """Import the repo agent's in-process entry point from the repo directory."""
+    add_repo_to_path()
+    from main import solve_task
+
+    return solve_task
+
+
+async def run_batch_api_evaluation(task_ids: list[str], agent_tasks: dict[str, dict]) -> list[TaskResult]:
+    """Answer all tasks with the repo agent's two-stage Batch API runner."""
+    add_repo_to_path()
+    from batch_runner import solve_tasks_with_batch_api
+
+    # The runner blocks while it polls the batch jobs, so keep it off the event loop
+    answers = await asyncio.to_thread(solve_tasks_with_batch_api, agent_tasks, REPO_DIR / "batch")
+
+    results = []
+    for task_id in task_ids:
+        predicted_answer = answers[task_id]
+        if predicted_answer is None:
+            results.append(TaskResult.failed(task_id, "No batch response"))
+        else:
+            results.append(TaskResult(task_id, True, predicted_answer, 0))
+    return results
+
+
+async def run_agent_in_process(script_dir: Path, task_id: str, show_output: bool = True) -> TaskResult:
+    """Run the repo agent on a single task as a coroutine in this process."""
+    solve_task = load_repo_solver()
+
+    if show_output:
+        print(f"   Starting task {task_id}...")
+
+    try:
+        predicted_answer = await with_rate_limit_backoff(lambda: solve_task(task_id, base_dir=script_dir))
+        result = TaskResult(task_id, True, predicted_answer, 0)
+    except Exception as e:
+        result = TaskResult.failed(task_id, str(e))
+        if show_output:
+            print(f"   Task {task_id} failed with error: {e}")
+
+    if show_output:
+        print(f"   Completed task {task_id} (success: {result.success})")
+    return result
+
+
+async def drain_to_log(stream: asyncio.StreamReader, task_id: str, log_path: Path):
+    """Append a subprocess's output to a shared log in large reads, prefixing each line with the task ID."""
+    prefix = f"[{task_id}] ".encode()
+    pending = b""
+    # Unbuffered append: each write is one syscall of whole lines, so tasks sharing the log do not interleave mid-line
+    with open(log_path, "ab", buffering=0) as log:
+        while chunk := await stream.read(LOG_READ_SIZE):
+            *lines, pending = (pending + chunk).split(b"\n")
+            if lines:
+                log.write(b"".join(prefix + line + b"\n" for line in lines))
+        if pending:
+            log.write(prefix + pending + b"\n")
+
+
+async def run_agent_on_task(script_dir: Path, task_id: str, log_path: Path | None = None, log_dir: Path | None = None) -> TaskResult:
+    """Run the agent on a single task asynchronously in its own subprocess.
+
+    With log_path, the subprocess output goes to that shared log file instead of the terminal.
+    With log_dir, it goes to log_dir/{task_id}.log, written by the child directly.
+    """
     main_py = script_dir / "main.py"
 
     print(f"   Starting task {task_id}...")
 
-    if show_output:
+    if log_path is not None:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(main_py), task_id, cwd=script_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        await drain_to_log(process.stdout, task_id, log_path)
+        return_code = await process.wait()
+    elif log_dir is not None:
+        # The child inherits the log file's descriptor, so its output never passes through this process
+        with open(log_dir / f"{task_id}.log", "wb") as log:
+            process = await asyncio.create_subprocess_exec(sys.executable, str(main_py), task_id, cwd=script_dir, stdout=log, stderr=asyncio.subprocess.STDOUT)
+        return_code = await process.wait()
+    else:
         # Let output go to terminal for real-time feedback
         process = await asyncio.create_subprocess_exec(sys.executable, str(main_py), task_id, cwd=script_dir)
         await process.wait()
         return_code = process.returncode
-    else:
-        # Capture output for silent execution
-        process = await asyncio.create_subprocess_exec(
-            sys.executable, str(main_py), task_id, cwd=script_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        return_code = process.returncode
 
     # Read the output file
     output_file = script_dir / "outputs" / f"{task_id}.json"
-    result = {
-        "task_id": task_id,
-        "success": False,
-        "predicted_answer": None,
-        "return_code": return_code,
-    }
+    result = TaskResult(task_id, False, None, return_code)
 
-    if output_file.exists():
-        try:
-            with open(output_file) as f:
-                output_data = json.load(f)
-            result["success"] = True
-            result["predicted_answer"] = output_data.get("predicted_answer")
-        except Exception as e:
-            result["error"] = str(e)
-
-    print(f"   Completed task {task_id} (success: {result['success']})")
+    # Parse off the event loop so other tasks keep running while this one is read
+    try:
+        output_data = await asyncio.to_thread(read_output_file, output_file)
+    except Exception as e:
+        result.error = str(e)
+    else:
+        if output_data is not None:
+            result.success = True
+            result.predicted_answer = output_data.get("predicted_answer")
+
+    print(f"   Completed task {task_id} (success: {result.success})")
     return result
 
 
-async def run_simple_tool_calling_agent_on_task(task_id: str, task_data: dict, show_output: bool = True) -> dict:
+async def run_simple_tool_calling_agent_on_task(task_id: str, task_data: dict, show_output: bool = True) -> TaskResult:
     """Run the simple tool calling agent on a single task asynchronously."""
     if show_output:
         print(f"   Starting task {task_id}...")
 
     try:
         # Run the agent directly using the imported function
-        predicted_answer = await solve_longbench_task(question=task_data["question"], context_str=task_data["context"], choices=task_data.get("choices", []))
+        predicted_answer = await with_rate_limit_backoff(
+            lambda: solve_longbench_task(question=task_data["question"], context_str=task_data["context"], choices=task_data.get("choices", []))
+        )
 
-        result = {
-            "task_id": task_id,
-            "success": True,
-            "predicted_answer": predicted_answer,
-            "return_code": 0,
-        }
+        result = TaskResult(task_id, True, predicted_answer, 0)
 
     except Exception as e:
-        result = {"task_id": task_id, "success": False, "predicted_answer": None, "return_code": 1, "error": str(e)}
+        result = TaskResult.failed(task_id, str(e))
         if show_output:
             print(f"   Task {task_id} failed with error: {e}")
 
     if show_output:
-        print(f"   Completed task {task_id} (success: {result['success']})")
+        print(f"   Completed task {task_id} (success: {result.success})")
     return result
 
 
 def save_task_to_file(task_data: dict, task_id: str, inputs_dir: Path):
     """Save a task to the inputs directory."""
     task_file = inputs_dir / f"{task_id}.json"
+    context_file = inputs_dir / f"{task_id}.ctx.txt"
 
     # Convert benchmark task format to agent format
     agent_task = {
@@ -105,13 +237,17 @@ def save_task_to_file(task_data: dict, task_id: str, inputs_dir: Path):
         "answer": task_data.get("correct_answer_letter", ""),  # For evaluation
     }
 
-    with open(task_file, "w") as f:
-        json.dump(agent_task, f, indent=2)
+    # The multi-MB context goes to a plain-text side file instead of being escaped into the JSON
+    context_file.write_text(agent_task["context"], encoding="utf-8")
+    task_record = {key: value for key, value in agent_task.items() if key != "context"}
+    task_record["context_file"] = context_file.name
+    with open(task_file, "wb") as f:
+        f.write(orjson.dumps(task_record, option=orjson.OPT_INDENT_2))
 
     return agent_task
 
 
-async def run_parallel_evaluation(limit: int = 5, sequential: bool = False, use_simple_tool_calling: bool = False):
+async def run_parallel_evaluation(limit: int = 5, sequential: bool = False, use_simple_tool_calling: bool = False, use_subprocess: bool = False, concurrency: int | None = None, use_batch_api: bool = False, seed: int | None = None, per_task_logs: bool = False):
     """Run parallel evaluation on LongBench tasks."""
     agent_type = "Simple Tool Calling" if use_simple_tool_calling else "Default Repo"
     print(f"LongBench Parallel Agent Evaluation ({agent_type}) (limit={limit})")
@@ -130,118 +266,153 @@ async def run_parallel_evaluation(limit: int = 5, sequential: bool = False, use_
         limit = len(val_task_ids)
         print(f"   Limiting to available tasks: {limit}")
 
-    selected_task_ids = random.sample(val_task_ids, limit)
-    print(f"   Selected {len(selected_task_ids)} random tasks")
+    # A fixed seed selects the same tasks on every run, so runs are comparable; sorting keeps their order stable too
+    rng = random.Random(seed)
+    selected_task_ids = sorted(rng.sample(val_task_ids, limit))
+    print(f"   Selected {len(selected_task_ids)} random tasks" + (f" (seed={seed})" if seed is not None else ""))
 
     # 2. Prepare task files
     print("\n2. Preparing task files...")
 
-    tasks_data = {}
+    # Scoring only needs each task's answer letter. Full tasks, contexts included, stay in
+    # memory only for agents that take them from memory rather than from the task files.
+    expected_answers = {}
+    resident_tasks = {}
+    if not use_simple_tool_calling:
+        inputs_dir = Path(__file__).parent / "repo" / "inputs"
+        inputs_dir.mkdir(exist_ok=True)
+
     for task_id in selected_task_ids:
         task_info = benchmark.get_task_info(task_id)
-        tasks_data[task_id] = {"benchmark_task": task_info}
+        expected_answers[task_id] = task_info.get("correct_answer_letter", "")
+        if use_simple_tool_calling:
+            resident_tasks[task_id] = task_info
+        else:
+            agent_task = save_task_to_file(task_info, task_id, inputs_dir)
+            if use_batch_api:
+                resident_tasks[task_id] = agent_task
 
     if use_simple_tool_calling:
         print("   Using simple tool calling agent (async parallelism)")
     else:
-        script_dir = Path(__file__).parent / "repo"
-        inputs_dir = script_dir / "inputs"
-        inputs_dir.mkdir(exist_ok=True)
-
-        for task_id in selected_task_ids:
-            task_info = tasks_data[task_id]["benchmark_task"]
-            agent_task = save_task_to_file(task_info, task_id, inputs_dir)
-            tasks_data[task_id]["agent_task"] = agent_task
-
-        print(f"   Saved {len(tasks_data)} task files to {inputs_dir}")
+        print(f"   Saved {len(selected_task_ids)} task files to {inputs_dir}")
 
     # 3. Run agents
-    mode = "sequentially" if sequential else "in parallel"
+    if use_batch_api and not use_simple_tool_calling:
+        mode = "via the Batch API"
+    else:
+        mode = "sequentially" if sequential else "in parallel"
     print(f"\n3. Running {agent_type} agents {mode}...")
     start_time = time.time()
 
+    # Each result is written and scored as soon as it finishes, so a crashed run keeps its
+    # progress and only counts and failed task IDs stay in memory
+    RESULTS_DIR.mkdir(exist_ok=True)
+    run_name = f"run_{time.strftime('%Y%m%d_%H%M%S')}"
+    results_file = RESULTS_DIR / f"{run_name}.jsonl"
+    print(f"   Streaming results to {results_file}")
+
     if use_simple_tool_calling:
-        if sequential:
-            # Run tasks one by one for easier debugging
-            results = []
-            for task_id in selected_task_ids:
-                task_info = tasks_data[task_id]["benchmark_task"]
-                result = await run_simple_tool_calling_agent_on_task(task_id, task_info, show_output=True)
-                results.append(result)
-        else:
-            # Use asyncio.gather for maximum parallelization
-            agent_tasks = [
-                run_simple_tool_calling_agent_on_task(task_id, tasks_data[task_id]["benchmark_task"], show_output=True) for task_id in selected_task_ids
-            ]
-            results = await asyncio.gather(*agent_tasks, return_exceptions=True)
-    else:
+
+        def run_one(task_id):
+            # Popped so each context is released as soon as its task finishes
+            return run_simple_tool_calling_agent_on_task(task_id, resident_tasks.pop(task_id), show_output=True)
+
+    elif use_subprocess:
         script_dir = Path(__file__).parent / "repo"
-        if sequential:
-            # Run tasks one by one for easier debugging
-            results = []
-            for task_id in selected_task_ids:
-                result = await run_agent_on_task(script_dir, task_id, show_output=True)
-                results.append(result)
-        else:
-            # Use asyncio.gather for maximum parallelization
-            agent_tasks = [run_agent_on_task(script_dir, task_id, show_output=True) for task_id in selected_task_ids]
-            results = await asyncio.gather(*agent_tasks, return_exceptions=True)
+        if per_task_logs:
+            # One log file per task, written by each child without being read back through this process
+            log_dir = RESULTS_DIR / run_name
+            log_dir.mkdir()
+            print(f"   Writing agent output to {log_dir}/<task_id>.log")
 
-    end_time = time.time()
-    total_time = end_time - start_time
+            def run_one(task_id):
+                return run_agent_on_task(script_dir, task_id, log_dir=log_dir)
 
-    # Filter out exceptions and convert them to error results
-    processed_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            processed_results.append({"task_id": selected_task_ids[i], "success": False, "predicted_answer": None, "return_code": 1, "error": str(result)})
         else:
-            processed_results.append(result)
+            # Subprocess output goes to one log file rather than many processes contending for the terminal
+            agent_log = RESULTS_DIR / f"{run_name}.log"
+            print(f"   Writing agent output to {agent_log}")
 
-    results = processed_results
+            def run_one(task_id):
+                return run_agent_on_task(script_dir, task_id, log_path=agent_log)
 
-    print(f"\n   Completed {len(results)} tasks in {total_time:.2f} seconds")
-    if results:
-        print(f"   Average time per task: {total_time / len(results):.2f} seconds")
+    else:
+        # In-process by default; --subprocess isolates each task for debugging
+        script_dir = Path(__file__).parent / "repo"
+
+        def run_one(task_id):
+            return run_agent_in_process(script_dir, task_id, show_output=True)
 
-    # 4. Evaluate results
-    print("\n4. Evaluating results...")
+    completed_count = 0
     correct_count = 0
     successful_count = 0
     failed_tasks = []
 
-    for result in results:
-        task_id = result.get("task_id")
-        success = result.get("success")
-        predicted = result.get("predicted_answer")
-
-        if not task_id:
-            continue
-
-        if success:
-            successful_count += 1
-            if use_simple_tool_calling:
-                expected = tasks_data[task_id]["benchmark_task"]["correct_answer_letter"]
+    with open(results_file, "ab") as results_out:
+
+        def record(result):
+            """Write one result line and fold it into the running counts."""
+            nonlocal completed_count, correct_count, successful_count
+            results_out.write(orjson.dumps(result) + b"\n")
+            results_out.flush()
+            completed_count += 1
+
+            task_id = result.task_id
+            predicted = result.predicted_answer
+
+            if result.success:
+                successful_count += 1
+                expected = expected_answers[task_id]
+
+                # Evaluate using benchmark
+                eval_result = benchmark.evaluate(task_id, predicted)
+                if eval_result.score == 1.0:
+                    correct_count += 1
+                    print(f"   ✓ {task_id}: {predicted} (correct)")
+                else:
+                    print(f"   ✗ {task_id}: {predicted} (expected {expected})")
             else:
-                expected = tasks_data[task_id]["agent_task"]["answer"]
+                failed_tasks.append(task_id)
+                print(f"   ✗ {task_id}: FAILED - {result.error}")
+
+        if use_batch_api and not use_simple_tool_calling:
+            # One upload for all tasks; results arrive together once the batch jobs finish
+            for result in await run_batch_api_evaluation(selected_task_ids, resident_tasks):
+                record(result)
+        elif sequential:
+            # Run tasks one by one for easier debugging
+            for task_id in selected_task_ids:
+                record(await run_guarded(task_id, run_one))
+        else:
+            # Bound in-flight tasks so a large --limit does not trip provider rate limits or
+            # hold every task's context in memory at once
+            if concurrency is None:
+                concurrency = min(len(selected_task_ids), (os.cpu_count() or 1) * 2)
+            semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+            async def run_and_record(task_id):
+                async with semaphore:
+                    result = await run_guarded(task_id, run_one)
+                record(result)
+
+            # Task failures are already results; anything that still escapes (e.g. an evaluation
+            # error or Ctrl-C) cancels the remaining tasks instead of leaving them running
+            async with asyncio.TaskGroup() as task_group:
+                for task_id in selected_task_ids:
+                    task_group.create_task(run_and_record(task_id))
 
-            # Evaluate using benchmark
-            eval_result = benchmark.evaluate(task_id, predicted)
-            is_correct = eval_result.score == 1.0
+    end_time = time.time()
+    total_time = end_time - start_time
 
-            if is_correct:
-                correct_count += 1
-                print(f"   ✓ {task_id}: {predicted} (correct)")
-            else:
-                print(f"   ✗ {task_id}: {predicted} (expected {expected})")
-        else:
-            failed_tasks.append(task_id)
-            print(f"   ✗ {task_id}: FAILED - {result.get('error')}")
+    print(f"\n   Completed {completed_count} tasks in {total_time:.2f} seconds")
+    if completed_count:
+        print(f"   Average time per task: {total_time / completed_count:.2f} seconds")
 
-    # 5. Summary
-    print("\n5. Summary:")
+    # 4. Summary
+    print("\n4. Summary:")
     print(f"   Agent type: {agent_type}")
-    print(f"   Total tasks: {len(results)}")
+    print(f"   Total tasks: {completed_count}")
     print(f"   Successful: {successful_count}")
     print(f"   Failed: {len(failed_tasks)}")
     print(f"   Correct: {correct_count}")
@@ -261,10 +432,16 @@ def main():
     parser.add_argument("--limit", type=int, default=5, help="Number of tasks to run (default: 5)")
     parser.add_argument("--sequential", action="store_true", help="Run tasks sequentially instead of in parallel (for debugging)")
     parser.add_argument("--simple-tool-calling", action="store_true", help="Use the simple tool calling agent instead of the default repo agent")
+    parser.add_argument("--subprocess", "--isolate", action="store_true", help="Run each default repo agent task in its own subprocess instead of in-process (for debugging)")
+    parser.add_argument("--max-concurrency", "--concurrency", dest="concurrency", type=int, default=None, help="Maximum number of tasks running at once in parallel mode (default: twice the CPU count, capped at the number of tasks)")
+    parser.add_argument("--batch-api", action="store_true", help="Answer default repo agent tasks via the OpenAI Batch API (half price, results within 24h)")
+    parser.add_argument("--task-logs", action="store_true", help="With --subprocess, write each task's output to its own log file instead of one shared, task-prefixed log")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for task selection, for reproducible runs (default: unseeded)")
     args = parser.parse_args()
 
     # Run the async evaluation
-    asyncio.run(run_parallel_evaluation(args.limit, args.sequential, args.simple_tool_calling))
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(run_parallel_evaluation(args.limit, args.sequential, args.simple_tool_calling, args.subprocess, args.concurrency, args.batch_api, args.seed, args.task_logs))
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@
 Explicit context management for rolling window processing.
 """
 
+import asyncio
+import functools
 import logging
 from collections.abc import Iterator
 from dataclasses import dataclass
@@ -11,14 +13,20 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class ContextWindow:
-    """Represents a window of context with explicit size management."""
+    """Represents a window of context with explicit size management.
+
+    Added text is kept as separate fragments and only joined when the content is read,
+    so adding a summary does not copy everything accumulated so far. Each window is
+    still joined once when read, and the join is no larger than the prompt it goes into.
+    """
 
-    content: str
     max_size: int
+    fragments: tuple[str, ...] = ()
+    size: int = 0  # Length of the joined content
 
-    @property
-    def size(self) -> int:
-        return len(self.content)
+    @functools.cached_property
+    def content(self) -> str:
+        return "\n\n".join(self.fragments)
 
     @property
     def is_full(self) -> bool:
@@ -30,12 +38,14 @@ class ContextWindow:
 
     def add(self, text: str) -> "ContextWindow":
         """Create new window with added text (immutable)."""
-        return ContextWindow(content=self.content + "\n\n" + text if self.content else text, max_size=self.max_size)
+        if not self.size:
+            return ContextWindow(max_size=self.max_size, fragments=(text,), size=len(text))
+        return ContextWindow(max_size=self.max_size, fragments=(*self.fragments, text), size=self.size + 2 + len(text))
 
-    def compress(self, compression_fn) -> "ContextWindow":
-        """Compress content using provided function."""
-        compressed = compression_fn(self.content)
-        return ContextWindow(content=compressed, max_size=self.max_size)
+    async def compress(self, compression_fn) -> "ContextWindow":
+        """Compress content using provided async function."""
+        compressed = await compression_fn(self.content)
+        return ContextWindow(max_size=self.max_size, fragments=(compressed,), size=len(compressed))
 
 
 def sliding_windows(text: str, window_size: int, stride: int) -> Iterator[str]:
@@ -49,7 +59,7 @@ def sliding_windows(text: str, window_size: int, stride: int) -> Iterator[str]:
             break
 
 
-def process_with_rolling_context(text: str, chunk_size: int, context_size: int, process_chunk_fn, compress_context_fn) -> str:
+async def process_with_rolling_context(text: str, chunk_size: int, context_size: int, process_chunk_fn, compress_context_fn) -> str:
     """
     Process text with explicit rolling context management.
 
@@ -57,21 +67,21 @@ def process_with_rolling_context(text: str, chunk_size: int, context_size: int,
         text: Full text to process
         chunk_size: Size of each chunk to process
         context_size: Maximum size of maintained context
-        process_chunk_fn: Function to process (context, chunk) -> summary
-        compress_context_fn: Function to compress context when full
+        process_chunk_fn: Async function to process (context, chunk) -> summary
+        compress_context_fn: Async function to compress context when full
 
     Returns:
         Final processed context
     """
     # Initialize context window
-    context = ContextWindow(content="", max_size=context_size)
+    context = ContextWindow(max_size=context_size)
 
     # Process chunks with stride = chunk_size (no overlap)
     for i, chunk in enumerate(sliding_windows(text, chunk_size, chunk_size)):
         logger.info(f"Processing chunk {i + 1}, size: {len(chunk)}")
 
         # Process chunk with current context
-        summary = process_chunk_fn(context.content, chunk)
+        summary = await process_chunk_fn(context.content, chunk)
 
         # Check if summary fits in context
         if context.can_fit(summary):
@@ -79,9 +89,47 @@ def process_with_rolling_context(text: str, chunk_size: int, context_size: int,
         else:
             # Compress context first, then add summary
             logger.info(f"Context full ({context.size}/{context.max_size}), compressing...")
-            context = context.compress(compress_context_fn)
+            context = await context.compress(compress_context_fn)
             context = context.add(summary)
 
         logger.info(f"Context size: {context.size}/{context.max_size}")
 
     return context.content
+
+
+async def process_with_parallel_summaries(text: str, chunk_size: int, summarize_chunk_fn, merge_fn, max_concurrency: int) -> str:
+    """
+    Summarize every chunk independently, then merge summaries pairwise until one remains.
+
+    Unlike the rolling context, no chunk waits for the previous one, so N chunks take
+    about log2(N) + 1 rounds of LLM calls instead of N.
+
+    Args:
+        text: Full text to process
+        chunk_size: Size of each chunk to process
+        summarize_chunk_fn: Async function to summarize (chunk) -> summary
+        merge_fn: Async function to merge (earlier summary, later summary) -> summary
+        max_concurrency: Maximum number of LLM calls in flight at once
+
+    Returns:
+        Final merged summary
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(fn, *args):
+        async with semaphore:
+            return await fn(*args)
+
+    chunks = list(sliding_windows(text, chunk_size, chunk_size))
+    logger.info(f"Summarizing {len(chunks)} chunks in parallel")
+    summaries = await asyncio.gather(*(bounded(summarize_chunk_fn, chunk) for chunk in chunks))
+
+    # Merge neighbours so the summaries stay in document order; an odd one out waits for the next round
+    while len(summaries) > 1:
+        logger.info(f"Merging {len(summaries)} summaries")
+        merged = await asyncio.gather(*(bounded(merge_fn, summaries[i], summaries[i + 1]) for i in range(0, len(summaries) - 1, 2)))
+        if len(summaries) % 2:
+            merged.append(summaries[-1])
+        summaries = merged
+
+    return summaries[0] if summaries else ""
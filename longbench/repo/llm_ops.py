@@ -2,22 +2,38 @@
 Simple LLM operations for context processing.
 """
 
+import re
+
 import litellm
+from cache import cache_get, cache_put
 
 # Configuration
 MODEL = "gpt-4.1-mini"
 TEMPERATURE = 0.1
-
-
-def llm_call(prompt: str, max_tokens: int = 1000) -> str:
-    """Make a simple LLM call."""
-    response = litellm.completion(model=MODEL, messages=[{"role": "user", "content": prompt}], temperature=TEMPERATURE, max_tokens=max_tokens)
-    return response.choices[0].message.content
-
-
-def process_chunk_with_context(context: str, chunk: str, question: str) -> str:
-    """Process a new chunk given existing context and question."""
-    prompt = f"""You are processing a long document to answer a question. 
+SUMMARY_MAX_TOKENS = 1000
+ANSWER_MAX_TOKENS = 500
+
+# A stated answer, e.g. "Answer: C", "the answer is (C)" or "Answer: **C**"; the letter itself
+# must be a capital, so the article in "the answer is a ..." does not count
+_ANSWER_RE = re.compile(r"(?i:answer)(?:\s+is)?[\s:*(\[]*([ABCD])\b")
+# A capital choice letter standing on its own, e.g. "C" or "(C)", but not the A in "Answer"
+_CHOICE_RE = re.compile(r"\b([ABCD])\b")
+
+
+async def llm_call(prompt: str, max_tokens: int = 1000) -> str:
+    """Make a simple LLM call, reusing a cached response for an identical request when caching is on."""
+    cache_key = f"{MODEL}|{TEMPERATURE}|{max_tokens}|{prompt}"
+    content = cache_get(cache_key)
+    if content is None:
+        response = await litellm.acompletion(model=MODEL, messages=[{"role": "user", "content": prompt}], temperature=TEMPERATURE, max_tokens=max_tokens)
+        content = response.choices[0].message.content
+        cache_put(cache_key, content)
+    return content
+
+
+def build_chunk_prompt(context: str, chunk: str, question: str) -> str:
+    """Build the prompt that summarizes a new chunk given existing context and question."""
+    return f"""You are processing a long document to answer a question. 
 You have a rolling context of previous information and a new chunk to process.
 
 Question: {question}
@@ -35,10 +51,13 @@ Provide a concise summary that:
 
 Summary:"""
 
-    return llm_call(prompt, max_tokens=1000)
+
+async def process_chunk_with_context(context: str, chunk: str, question: str) -> str:
+    """Process a new chunk given existing context and question."""
+    return await llm_call(build_chunk_prompt(context, chunk, question), max_tokens=SUMMARY_MAX_TOKENS)
 
 
-def compress_context(context: str, question: str) -> str:
+async def compress_context(context: str, question: str) -> str:
     """Compress context while preserving question-relevant information."""
     prompt = f"""Compress the following context while preserving all information relevant to answering the question.
 Remove redundant information but keep all important facts and details.
@@ -50,14 +69,36 @@ Context to Compress:
 
 Compressed Context:"""
 
-    return llm_call(prompt, max_tokens=len(context) // 2)
+    return await llm_call(prompt, max_tokens=len(context) // 2)
 
 
-def answer_question(question: str, context: str, choices: list[str]) -> str:
-    """Answer a multiple choice question given context."""
+async def merge_summaries(first: str, second: str, question: str) -> str:
+    """Merge two summaries of consecutive parts of a document into one."""
+    prompt = f"""You are combining notes taken on two consecutive parts of a long document in order to answer a question.
+
+Question: {question}
+
+Notes on the earlier part:
+{first}
+
+Notes on the later part:
+{second}
+
+Provide one concise summary that:
+1. Keeps all information relevant to answering the question
+2. Removes repetition between the two sets of notes
+3. Maintains important details and facts
+
+Summary:"""
+
+    return await llm_call(prompt, max_tokens=SUMMARY_MAX_TOKENS)
+
+
+def build_answer_prompt(question: str, context: str, choices: list[str]) -> str:
+    """Build the prompt that answers a multiple choice question given context."""
     choices_text = "\n".join(f"{chr(65 + i)}: {choice}" for i, choice in enumerate(choices))
 
-    prompt = f"""Based on the context, answer the question by selecting the best choice.
+    return f"""Based on the context, answer the question by selecting the best choice.
 
 Context:
 {context}
@@ -71,11 +112,18 @@ Think step by step, then provide your answer as a single letter (A, B, C, or D).
 
 Answer:"""
 
-    response = llm_call(prompt, max_tokens=500)
 
-    # Extract letter from response
-    response = response.strip().upper()
-    for letter in ["A", "B", "C", "D"]:
-        if letter in response:
-            return letter
-    return "A"  # Default
+def parse_choice(response: str) -> str:
+    """Extract the answer letter from a response."""
+    # The prompt asks for reasoning first, so the last stated answer is the final one
+    matches = _ANSWER_RE.findall(response)
+    if not matches:
+        # Otherwise the final standalone letter, matched case-sensitively so articles are not letters
+        matches = _CHOICE_RE.findall(response)
+    return matches[-1] if matches else "A"  # Default
+
+
+async def answer_question(question: str, context: str, choices: list[str]) -> str:
+    """Answer a multiple choice question given context."""
+    response = await llm_call(build_answer_prompt(question, context, choices), max_tokens=ANSWER_MAX_TOKENS)
+    return parse_choice(response)
@@ -4,6 +4,7 @@ Simple LongBench Agent - Main entry point for solving LongBench tasks.
 """
 
 import argparse
+import asyncio
 import logging
 import sys
 from pathlib import Path
@@ -20,6 +21,42 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def solve_task(task_id, base_dir=Path(".")):
+    """Solve the task in inputs/{task_id}.json under base_dir and write outputs/{task_id}.json.
+
+    Returns the predicted answer. Errors propagate to the caller instead of exiting,
+    so the task can be run in-process alongside others.
+    """
+    task_file_path = Path(base_dir) / "inputs" / f"{task_id}.json"
+    output_file_path = Path(base_dir) / "outputs" / f"{task_id}.json"
+
+    # Load task from file
+    task = load_task_from_file(task_file_path)
+
+    logger.info(f"Task loaded: {task['domain']} - {task['sub_domain']}")
+    logger.info(f"Difficulty: {task['difficulty']}, Length: {task['length']}")
+    logger.info(f"Context length: {len(task['context'])} characters")
+
+    print(f"Loaded task: {task['domain']} - {task['sub_domain']}")
+    print(f"Context length: {len(task['context'])} characters")
+    print("-" * 40)
+
+    # Solve the task; LLM calls are awaited, so other in-process tasks run meanwhile
+    predicted_answer = await solve_longbench_task(question=task["question"], context=task["context"], choices=task["choices"])
+
+    # Write output
+    output_dir = output_file_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    output_data = {"task_id": task.get("_id", task_id), "predicted_answer": predicted_answer, "choices": task["choices"]}
+
+    # Written from a worker thread so concurrent in-process tasks are not blocked on disk I/O
+    await asyncio.to_thread(write_output, output_file_path, output_data)
+    print(f"\nAgent prediction written to {output_file_path}")
+    print(f"Predicted answer: {predicted_answer}")
+    return predicted_answer
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="LongBench agent for solving long-context QA tasks")
@@ -29,38 +66,12 @@ def main():
     logger.info("--- LongBench Agent Run Started ---")
     logger.info(f"Processing task ID: {args.task_id}")
 
-    # Set up paths
-    task_file_path = Path("inputs") / f"{args.task_id}.json"
-    output_file_path = Path("outputs") / f"{args.task_id}.json"
-
     try:
-        # Load task from file
-        task = load_task_from_file(task_file_path)
-
-        logger.info(f"Task loaded: {task['domain']} - {task['sub_domain']}")
-        logger.info(f"Difficulty: {task['difficulty']}, Length: {task['length']}")
-        logger.info(f"Context length: {len(task['context'])} characters")
-
-        print(f"Loaded task: {task['domain']} - {task['sub_domain']}")
-        print(f"Context length: {len(task['context'])} characters")
-        print("-" * 40)
-
-        # Solve the task
-        predicted_answer = solve_longbench_task(question=task["question"], context=task["context"], choices=task["choices"])
-
-        # Write output
-        output_dir = output_file_path.parent
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        output_data = {"task_id": task.get("_id", args.task_id), "predicted_answer": predicted_answer, "choices": task["choices"]}
-
-        write_output(output_file_path, output_data)
-        print(f"\nAgent prediction written to {output_file_path}")
-        print(f"Predicted answer: {predicted_answer}")
+        asyncio.run(solve_task(args.task_id))
 
-    except FileNotFoundError:
-        logger.error(f"Task file not found: {task_file_path}")
-        print(f"Error: Task file not found at '{task_file_path}'")
+    except FileNotFoundError as e:
+        logger.error(f"Task file not found: {e.filename}")
+        print(f"Error: Task file not found at '{e.filename}'")
         sys.exit(1)
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}", exc_info=True)
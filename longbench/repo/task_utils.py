@@ -2,8 +2,10 @@
 Task utilities for LongBench agent.
 """
 
-import json
 import logging
+from pathlib import Path
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +25,17 @@ def load_task_from_file(file_path):
         "choices": ["A", "B", "C", "D"],
         "answer": "A|B|C|D"  # Optional, for evaluation
     }
+
+    Instead of "context", the task may name a UTF-8 text file holding it, relative to
+    the task file: "context_file": "task_id.ctx.txt".
     """
     logger.info(f"Loading task from {file_path}")
 
-    with open(file_path) as f:
-        task = json.load(f)
+    with open(file_path, "rb") as f:
+        task = orjson.loads(f.read())
+
+    if "context" not in task and "context_file" in task:
+        task["context"] = (Path(file_path).parent / task["context_file"]).read_text(encoding="utf-8")
 
     # Validate required fields
     required_fields = ["question", "context", "choices"]
@@ -46,7 +54,7 @@ def write_output(file_path, data):
     """Write the agent's output to a JSON file."""
     logger.info(f"Writing output to {file_path}")
 
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
     logger.info("Output written successfully")
@@ -2,11 +2,19 @@
 LongBench agent using tool-based search strategy.
 """
 
+import asyncio
+import hashlib
 import logging
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from heapq import nlargest
+from itertools import chain
+from operator import attrgetter
+from typing import Literal
+from weakref import WeakValueDictionary
 
 from agents import Agent, RunContextWrapper, Runner, function_tool
+from pydantic import BaseModel
 
 from .hooks import create_logging_tool_wrapper
 from .search_engine import AdvancedSearchEngine, format_search_results
@@ -16,18 +24,45 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 
+# Search engine builds of live contexts, keyed by a digest of their document, so runs over
+# the same document share one index while any of them is still running
+_search_engine_builds: WeakValueDictionary[bytes, asyncio.Task] = WeakValueDictionary()
+
+
+def _build_search_engine(context: str) -> asyncio.Task:
+    """Start indexing a document in a worker thread, so it overlaps the agent's first model call."""
+    return asyncio.create_task(asyncio.to_thread(AdvancedSearchEngine, context))
+
+
 @dataclass
 class LongContext:
     context: str
-    search_engine: AdvancedSearchEngine | None = field(default=None, init=False)
+    search_engine: AdvancedSearchEngine | None = None
+    search_engine_build: asyncio.Task | None = None
 
     def __post_init__(self):
-        """Initialize the search engine after the context is set."""
-        self.search_engine = AdvancedSearchEngine(self.context)
+        """Start building the search engine after the context is set; tools wait for it on first use."""
+        if self.search_engine is None and self.search_engine_build is None:
+            self.search_engine_build = _build_search_engine(self.context)
+
+    @classmethod
+    def for_context(cls, context: str) -> "LongContext":
+        """Wrap a document, reusing the search index of any live context over the same text."""
+        key = hashlib.blake2b(context.encode(), digest_size=16).digest()
+        search_engine_build = _search_engine_builds.get(key)
+        if search_engine_build is None:
+            search_engine_build = _search_engine_builds[key] = _build_search_engine(context)
+        return cls(context=context, search_engine_build=search_engine_build)
+
+    async def get_search_engine(self) -> AdvancedSearchEngine:
+        """Return the search engine, waiting for it to finish building the first time."""
+        if self.search_engine is None:
+            self.search_engine = await self.search_engine_build
+        return self.search_engine
 
 
 @function_tool
-def search_context(ctx: RunContextWrapper[LongContext], keywords: list[str], max_results: int = 15, context_chars: int = 1000) -> str:
+async def search_context(ctx: RunContextWrapper[LongContext], keywords: list[str], max_results: int = 15, context_chars: int = 1000) -> str:
     """Search the context for keywords using optimized search algorithms.
 
     This tool searches through the document to find relevant passages containing your keywords.
@@ -47,51 +82,58 @@ def search_context(ctx: RunContextWrapper[LongContext], keywords: list[str], max
         - For complex queries, do multiple searches with different keyword sets
         - Each result includes a cursor position for deeper exploration
     """
-    search_engine = ctx.context.search_engine
-    assert search_engine is not None, "Search engine not initialized"
+    # When the result windows could cover the whole document anyway, return it instead of searching
+    context = ctx.context.context
+    if len(context) <= 2 * max_results * context_chars:
+        logger.info("Context of %d characters fits in the results, returning it in full", len(context))
+        return f"===== Full context ({len(context)} chars) =====\n\n{context}"
+
+    search_engine = await ctx.context.get_search_engine()
 
     # Remove the explicit limit - let prompting handle this
     # Just log if there are many keywords
     if len(keywords) > 8:
-        logger.warning(f"Search called with {len(keywords)} keywords - this may be slow. Consider using fewer, more specific keywords.")
+        logger.warning("Search called with %d keywords - this may be slow. Consider using fewer, more specific keywords.", len(keywords))
 
     # Log search parameters
-    logger.info(f"search_context called with {len(keywords)} keywords: {keywords}")
-    logger.info(f"max_results={max_results}, context_chars={context_chars}")
+    logger.info("search_context called with %d keywords: %s", len(keywords), keywords)
+    logger.info("max_results=%s, context_chars=%s", max_results, context_chars)
+
+    # Searches run in a worker thread so other agents sharing the event loop keep going.
+    # They run one after the other: both are pure Python, so under the GIL running them
+    # together would not finish sooner and would waste the fuzzy pass when it is not needed.
 
     # Use Boolean AND search as the primary algorithm (fastest for multiple keywords)
-    start_time = time.time()
-    results = search_engine.boolean_search(keywords, max_results, context_chars)
-    boolean_time = time.time() - start_time
-    logger.info(f"Boolean AND search completed in {boolean_time:.2f}s, found {len(results)} results")
+    start_time = time.perf_counter()
+    results = await asyncio.to_thread(search_engine.boolean_search, keywords, max_results, context_chars)
+    boolean_time = time.perf_counter() - start_time
+    logger.info("Boolean AND search completed in %.2fs, found %d results", boolean_time, len(results))
 
     # If we need more results, try fuzzy search (more permissive)
     if len(results) < max_results // 2:
-        logger.info(f"Boolean AND found only {len(results)} results, trying fuzzy search...")
-        start_time = time.time()
-        fuzzy_results = search_engine.fuzzy_search(keywords, max_results, context_chars)
-        fuzzy_time = time.time() - start_time
-        logger.info(f"Fuzzy search completed in {fuzzy_time:.2f}s, found {len(fuzzy_results)} results")
+        logger.info("Boolean AND found only %d results, trying fuzzy search...", len(results))
+        start_time = time.perf_counter()
+        fuzzy_results = await asyncio.to_thread(search_engine.fuzzy_search, keywords, max_results, context_chars)
+        fuzzy_time = time.perf_counter() - start_time
+        logger.info("Fuzzy search completed in %.2fs, found %d results", fuzzy_time, len(fuzzy_results))
 
-        # Merge results, avoiding duplicates
-        existing_positions = {r.position for r in results}
-        added = 0
-        for result in fuzzy_results:
-            if result.position not in existing_positions and len(results) < max_results:
-                results.append(result)
-                existing_positions.add(result.position)
-                added += 1
-        logger.info(f"Added {added} unique fuzzy results")
+        # Keep one result per position, the best scoring one where both searches found it
+        best = {}
+        for r in chain(results, fuzzy_results):
+            prev = best.get(r.position)
+            if prev is None or r.score > prev.score:
+                best[r.position] = r
+        results = best.values()
 
-    # Sort all results by score
-    results.sort(key=lambda x: x.score, reverse=True)
-    logger.info(f"Returning {len(results)} total results")
+    # Keep the best results by score, in C rather than with a Python sort key lambda
+    results = nlargest(max_results, results, key=attrgetter("score"))
+    logger.info("Returning %d total results", len(results))
 
-    return format_search_results(results[:max_results], keywords)
+    return format_search_results(results, keywords)
 
 
 @function_tool
-def get_context_at_cursor(ctx: RunContextWrapper[LongContext], cursor: int, chars_before: int = 10000, chars_after: int = 10000) -> str:
+async def get_context_at_cursor(ctx: RunContextWrapper[LongContext], cursor: int, chars_before: int = 10000, chars_after: int = 10000) -> str:
     """Get expanded context around a specific cursor position.
 
     Use this after finding interesting results with search_context to read more of the document
@@ -105,9 +147,7 @@ def get_context_at_cursor(ctx: RunContextWrapper[LongContext], cursor: int, char
     Returns:
         Extended text context centered on the cursor position.
     """
-    search_engine = ctx.context.search_engine
-    assert search_engine is not None, "Search engine not initialized"
-
+    search_engine = await ctx.context.get_search_engine()
     context_text = search_engine.get_context_at_cursor(cursor, chars_before, chars_after)
 
     return f"===== Context at cursor {cursor} =====\n[{chars_before} chars before, {chars_after} chars after]\n\n{context_text}"
@@ -161,52 +201,16 @@ Remember: Effective searching is about choosing the RIGHT keywords, not ALL poss
 )
 
 
-# Simple extraction agent for choice extraction
-choice_extractor = Agent(
-    name="choice_extractor",
-    model="gpt-4.1-mini",
-    instructions="""You are a choice extraction assistant. Your job is to extract the final answer choice from a response.
+class ChoiceAnswer(BaseModel):
+    """Final answer to a multiple choice question."""
 
-Given a response to a multiple choice question, extract ONLY the letter of the final answer choice (A, B, C, or D).
-
-Rules:
-- Return only a single letter: A, B, C, or D
-- Look for the final answer in the response
-- If multiple choices are mentioned, return the one that appears to be the final conclusion
-- If no clear choice can be determined, return the first choice mentioned
-- Do not include any explanation or additional text""",
-)
+    reasoning: str
+    letter: Literal["A", "B", "C", "D"]
 
 
-async def extract_choice_from_answer(answer: str, choices: list[str] | None = None) -> str:
-    """Extract the choice letter from a verbose answer using a simple LLM call."""
-    if not choices:
-        return answer
-
-    prompt = f"""Extract the final answer choice from this response:
-
-Response: {answer}
-
-Available choices: {", ".join(choices)}
-
-Return only the letter (A, B, C, or D):"""
-
-    try:
-        result = await Runner.run(choice_extractor, input=prompt)
-        extracted = result.final_output.strip().upper()
-
-        # Validate the extracted choice
-        if extracted in ["A", "B", "C", "D"]:
-            return extracted
-        else:
-            # Fallback: return first character if it's a valid choice
-            first_char = extracted[0] if extracted else "A"
-            return first_char if first_char in ["A", "B", "C", "D"] else "A"
-
-    except Exception as e:
-        logger.warning(f"Failed to extract choice with LLM: {e}")
-        # Fallback to original answer
-        return answer
+# Same agent, but answering with the choice letter as structured output, so no second
+# call is needed to extract it from a free-form answer
+multiple_choice_agent = long_context_agent.clone(name="multiple_choice_agent", output_type=ChoiceAnswer)
 
 
 async def solve_longbench_task(question: str, context_str: str, choices: list[str] | None = None) -> str:
@@ -220,25 +224,38 @@ async def solve_longbench_task(question: str, context_str: str, choices: list[st
     Returns:
         The predicted answer
     """
-    logger.info(f"Starting LongBench task with question length: {len(question)}")
-    logger.info(f"Context length: {len(context_str)} characters")
+    logger.info("Starting LongBench task with question length: %d", len(question))
+    logger.info("Context length: %d characters", len(context_str))
 
-    context_obj = LongContext(context=context_str)
+    context_obj = LongContext.for_context(context_str)
 
     # Add choices information to the question if provided
     if choices:
-        question_with_choices = f"{question}\n\nChoices: {', '.join(choices)}\n\nPlease provide your reasoning and then clearly state your final answer as just the letter (A, B, C, or D)."
+        agent = multiple_choice_agent
+        question_with_choices = f"{question}\n\nChoices: {', '.join(choices)}\n\nPlease provide your reasoning and then your final answer as just the letter (A, B, C, or D)."
     else:
+        agent = long_context_agent
         question_with_choices = question
 
     logger.info("Running agent with advanced search capabilities...")
-    result = await Runner.run(long_context_agent, input=question_with_choices, context=context_obj)
-
-    # Extract the choice from the verbose answer if it's a multiple choice question
+    result = await Runner.run(agent, input=question_with_choices, context=context_obj)
+
+    # The document is reached through tools rather than resent each turn, so the repeated
+    # prefix is the instructions plus earlier turns, which the API caches automatically
+    usage = result.context_wrapper.usage
+    logger.info(
+        "Token usage: %d input (%d cached), %d output over %d requests",
+        usage.input_tokens,
+        usage.input_tokens_details.cached_tokens,
+        usage.output_tokens,
+        usage.requests,
+    )
+
+    # Multiple choice answers come back structured, with the letter already separated out
     if choices:
-        extracted_choice = await extract_choice_from_answer(result.final_output, choices)
-        logger.info(f"Extracted choice: {extracted_choice} from answer: {result.final_output[:100]}...")
-        return extracted_choice
+        answer = result.final_output
+        logger.info("Agent chose: %s with reasoning: %.100s...", answer.letter, answer.reasoning)
+        return answer.letter
 
-    logger.info(f"Agent completed with result: {result.final_output[:100]}...")
+    logger.info("Agent completed with result: %.100s...", result.final_output)
     return result.final_output
@@ -1,7 +1,7 @@
-import json
 import logging
 from typing import Any, Generic, TypeVar
 
+import orjson
 from agents import Agent, FunctionTool, RunContextWrapper, Tool
 
 T = TypeVar("T")
@@ -18,7 +18,7 @@ class DefaultHooks(Generic[T]):
         agent: Agent[T],
     ) -> None:
         """Called when the agent is being started."""
-        logger.info(f"Starting {agent.name} (on_agent_start hook)")
+        logger.info("Starting %s (on_agent_start hook)", agent.name)
 
     async def on_agent_end(
         self,
@@ -27,7 +27,7 @@ class DefaultHooks(Generic[T]):
         output: Any,
     ) -> None:
         """Called when the agent is being ended."""
-        logger.info(f"{agent.name} completed (on_agent_end hook)")
+        logger.info("%s completed (on_agent_end hook)", agent.name)
 
     async def on_start(
         self,
@@ -35,7 +35,7 @@ class DefaultHooks(Generic[T]):
         agent: Agent[T],
     ) -> None:
         """Called before the agent is invoked."""
-        logger.info(f"Starting {agent.name} (on_start hook)")
+        logger.info("Starting %s (on_start hook)", agent.name)
 
     async def on_end(
         self,
@@ -44,7 +44,7 @@ class DefaultHooks(Generic[T]):
         output: Any,
     ) -> None:
         """Called when the agent produces a final output."""
-        logger.info(f"{agent.name} completed (on_end hook)")
+        logger.info("%s completed (on_end hook)", agent.name)
 
     async def on_handoff(
         self,
@@ -53,7 +53,7 @@ class DefaultHooks(Generic[T]):
         source: Agent[T],
     ) -> None:
         """Called when the agent is being handed off to."""
-        logger.info(f"Handing off from {source.name} to {agent.name} (on_handoff hook)")
+        logger.info("Handing off from %s to %s (on_handoff hook)", source.name, agent.name)
 
     async def on_tool_start(
         self,
@@ -62,7 +62,7 @@ class DefaultHooks(Generic[T]):
         tool: Tool,
     ) -> None:
         """Called before a tool is invoked."""
-        logger.info(f"{agent.name} using tool: {tool.name} (on_tool_start hook)")
+        logger.info("%s using tool: %s (on_tool_start hook)", agent.name, tool.name)
 
     async def on_tool_end(
         self,
@@ -72,9 +72,10 @@ class DefaultHooks(Generic[T]):
         result: str,
     ) -> None:
         """Called after a tool is invoked."""
-        logger.info(f"{agent.name} completed tool: {tool.name} (on_tool_end hook)")
+        logger.info("%s completed tool: %s (on_tool_end hook)", agent.name, tool.name)
         logger.info("-" * 100)
-        logger.info(f"{result[:1000]}")
+        # Truncated by the format when the record is emitted, so filtered records never copy the result
+        logger.info("%.1000s", result)
         logger.info("-" * 100)
 
 
@@ -84,21 +85,23 @@ def create_logging_tool_wrapper(original_tool: FunctionTool) -> FunctionTool:
     original_on_invoke = original_tool.on_invoke_tool
 
     async def logging_on_invoke(ctx, input_args: str) -> Any:
-        # Log the arguments before calling the original tool
-        logger.info(f"Tool '{original_tool.name}' called with arguments: {input_args}")
-
-        # Parse arguments for prettier logging
-        try:
-            parsed_args = json.loads(input_args) if input_args else {}
-            logger.info(f"Parsed arguments: {parsed_args}")
-        except json.JSONDecodeError:
-            logger.warning(f"Could not parse arguments as JSON: {input_args}")
+        # The arguments are only parsed to be logged, so skip that entirely when INFO is filtered out
+        if logger.isEnabledFor(logging.INFO):
+            # Log the arguments before calling the original tool
+            logger.info("Tool %r called with arguments: %s", original_tool.name, input_args)
+
+            # Parse arguments for prettier logging
+            try:
+                parsed_args = orjson.loads(input_args) if input_args else {}
+                logger.info("Parsed arguments: %s", parsed_args)
+            except orjson.JSONDecodeError:
+                logger.warning("Could not parse arguments as JSON: %s", input_args)
 
         # Call the original tool
         result = await original_on_invoke(ctx, input_args)
 
         # Log the result
-        # logger.info(f"Tool '{original_tool.name}' returned: {result}")
+        # logger.info("Tool %r returned: %s", original_tool.name, result)
 
         return result
 
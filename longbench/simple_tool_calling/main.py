@@ -4,6 +4,7 @@ Simple LongBench Agent - Main entry point for solving LongBench tasks.
 """
 
 import argparse
+import asyncio
 import logging
 import sys
 from pathlib import Path
@@ -11,6 +12,11 @@ from pathlib import Path
 from agent import solve_longbench_task
 from task_utils import load_task_from_file, write_output
 
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (and unavailable on Windows); fall back to the default event loop
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,51 +26,71 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Main entry point."""
-    parser = argparse.ArgumentParser(description="LongBench agent for solving long-context QA tasks")
-    parser.add_argument("task_id", type=str, help="Task ID to process (looks for inputs/{task_id}.json)")
-    args = parser.parse_args()
+async def solve_task_file(task_id: str, semaphore: asyncio.Semaphore) -> bool:
+    """Solve the task in inputs/{task_id}.json and write outputs/{task_id}.json, returning whether it succeeded."""
+    # Set up paths
+    task_file_path = Path("inputs") / f"{task_id}.json"
+    output_file_path = Path("outputs") / f"{task_id}.json"
 
-    logger.info("--- LongBench Agent Run Started ---")
-    logger.info(f"Processing task ID: {args.task_id}")
+    async with semaphore:
+        logger.info(f"Processing task ID: {task_id}")
+        try:
+            # Load task from file, off the event loop so other tasks' requests keep going
+            task = await asyncio.to_thread(load_task_from_file, task_file_path)
 
-    # Set up paths
-    task_file_path = Path("inputs") / f"{args.task_id}.json"
-    output_file_path = Path("outputs") / f"{args.task_id}.json"
+            logger.info(f"[{task_id}] Task loaded: {task['domain']} - {task['sub_domain']}")
+            logger.info(f"[{task_id}] Difficulty: {task['difficulty']}, Length: {task['length']}")
+            logger.info(f"[{task_id}] Context length: {len(task['context'])} characters")
 
-    try:
-        # Load task from file
-        task = load_task_from_file(task_file_path)
+            print(f"[{task_id}] Loaded task: {task['domain']} - {task['sub_domain']}")
+            print(f"[{task_id}] Context length: {len(task['context'])} characters")
+            print("-" * 40)
 
-        logger.info(f"Task loaded: {task['domain']} - {task['sub_domain']}")
-        logger.info(f"Difficulty: {task['difficulty']}, Length: {task['length']}")
-        logger.info(f"Context length: {len(task['context'])} characters")
+            # Solve the task
+            predicted_answer = await solve_longbench_task(question=task["question"], context_str=task["context"], choices=task["choices"])
 
-        print(f"Loaded task: {task['domain']} - {task['sub_domain']}")
-        print(f"Context length: {len(task['context'])} characters")
-        print("-" * 40)
+            # Write output
+            output_dir = output_file_path.parent
+            output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Solve the task
-        predicted_answer = solve_longbench_task(question=task["question"], context_str=task["context"], choices=task["choices"])
+            output_data = {"task_id": task.get("_id", task_id), "predicted_answer": predicted_answer, "choices": task["choices"]}
 
-        # Write output
-        output_dir = output_file_path.parent
-        output_dir.mkdir(parents=True, exist_ok=True)
+            write_output(output_file_path, output_data)
+            print(f"\n[{task_id}] Agent prediction written to {output_file_path}")
+            print(f"[{task_id}] Predicted answer: {predicted_answer}")
+            return True
 
-        output_data = {"task_id": task.get("_id", args.task_id), "predicted_answer": predicted_answer, "choices": task["choices"]}
+        except FileNotFoundError:
+            logger.error(f"Task file not found: {task_file_path}")
+            print(f"Error: Task file not found at '{task_file_path}'")
+            return False
+        except Exception as e:
+            logger.error(f"[{task_id}] An unexpected error occurred: {e}", exc_info=True)
+            print(f"[{task_id}] An unexpected error occurred: {e}")
+            return False
 
-        write_output(output_file_path, output_data)
-        print(f"\nAgent prediction written to {output_file_path}")
-        print(f"Predicted answer: {predicted_answer}")
 
-    except FileNotFoundError:
-        logger.error(f"Task file not found: {task_file_path}")
-        print(f"Error: Task file not found at '{task_file_path}'")
-        sys.exit(1)
-    except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}", exc_info=True)
-        print(f"An unexpected error occurred: {e}")
+async def solve_task_files(task_ids: list[str], concurrency: int) -> bool:
+    """Solve several tasks concurrently in this process, returning whether all of them succeeded."""
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded = await asyncio.gather(*(solve_task_file(task_id, semaphore) for task_id in task_ids))
+    return all(succeeded)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="LongBench agent for solving long-context QA tasks")
+    parser.add_argument("task_ids", nargs="+", metavar="task_id", help="Task IDs to process (looks for inputs/{task_id}.json)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of tasks solved at once (default: 8)")
+    args = parser.parse_args()
+
+    logger.info("--- LongBench Agent Run Started ---")
+
+    # Tasks share one process, so their API calls overlap and startup is paid once
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        all_succeeded = runner.run(solve_task_files(args.task_ids, args.concurrency))
+
+    if not all_succeeded:
         sys.exit(1)
 
     logger.info("--- LongBench Agent Run Finished ---")
@@ -94,14 +94,14 @@ def test_initialization_performance():
         gc.collect()
 
         # Measure initialization time
-        start_time = time.time()
+        start_time = time.perf_counter()
         engine = AdvancedSearchEngine(doc)
-        init_time = time.time() - start_time
+        init_time = time.perf_counter() - start_time
 
         # Measure components separately
-        start_time = time.time()
-        tokens = engine._tokenize(doc)
-        tokenize_time = time.time() - start_time
+        start_time = time.perf_counter()
+        tokens, _ = engine._tokenize(doc)
+        tokenize_time = time.perf_counter() - start_time
 
         print(f"\nDocument size: {size:,} chars")
         print(f"  Total init time: {init_time:.3f}s")
@@ -119,9 +119,9 @@ def test_search_performance():
     doc = generate_test_document(doc_size)
 
     print(f"\nInitializing engine with {doc_size:,} char document...")
-    start_time = time.time()
+    start_time = time.perf_counter()
     engine = AdvancedSearchEngine(doc)
-    print(f"  Initialization took: {time.time() - start_time:.3f}s")
+    print(f"  Initialization took: {time.perf_counter() - start_time:.3f}s")
 
     # Test different keyword sets
     keyword_sets = [
@@ -145,9 +145,9 @@ def test_search_performance():
         for algo_name, algo_func in algorithms:
             gc.collect()
 
-            start_time = time.time()
+            start_time = time.perf_counter()
             results = algo_func(keywords, max_results=20, context_chars=1000)
-            search_time = time.time() - start_time
+            search_time = time.perf_counter() - start_time
 
             print(f"  {algo_name:12} - Time: {search_time:.3f}s, Results: {len(results)}")
 
@@ -168,11 +168,11 @@ def test_context_extraction_performance():
     for context_size in context_sizes:
         gc.collect()
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         for pos in positions:
             _ = engine.get_context_at_cursor(pos, context_size, context_size)
 
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - start_time
         avg_time = total_time / len(positions)
 
         print(f"  Context size {context_size:,} chars: {avg_time * 1000:.2f}ms per extraction")
@@ -204,9 +204,9 @@ async def test_search_tool_performance():
     for keywords, max_results, context_chars, description in test_cases:
         gc.collect()
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = await search_context(ctx, keywords, max_results, context_chars)
-        search_time = time.time() - start_time
+        search_time = time.perf_counter() - start_time
 
         print(f"\n{description}:")
         print(f"  Keywords: {keywords}")
@@ -229,14 +229,14 @@ def test_scaling_behavior():
         doc = generate_test_document(size)
 
         # Initialize engine
-        start_time = time.time()
+        start_time = time.perf_counter()
         engine = AdvancedSearchEngine(doc)
-        init_time = time.time() - start_time
+        init_time = time.perf_counter() - start_time
 
         # Run search
-        start_time = time.time()
+        start_time = time.perf_counter()
         results = engine.tf_idf_search(keywords, max_results=20, context_chars=1000)
-        search_time = time.time() - start_time
+        search_time = time.perf_counter() - start_time
 
         print(f"\nDocument size: {size:,} chars")
         print(f"  Init time: {init_time:.3f}s")
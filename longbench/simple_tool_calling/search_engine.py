@@ -3,14 +3,21 @@ Advanced search engine for long context documents.
 Implements various classical search algorithms with ranking.
 """
 
+import functools
 import logging
 import re
+import sys
 import time
-from collections import defaultdict
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
 from dataclasses import dataclass
+from itertools import accumulate
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"\b\w+\b")
+
 
 @dataclass
 class SearchResult:
@@ -28,24 +35,47 @@ class SearchResult:
         return self.position
 
 
+@functools.lru_cache(maxsize=128)
+def _keyword_pattern(keywords: tuple[str, ...]) -> re.Pattern:
+    """Compile one pattern that reports every keyword occurrence, overlapping ones included, in a single scan."""
+    # Longest first, so where keywords share a start the longest is reported; shorter ones are inside it
+    alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))")
+
+
 class AdvancedSearchEngine:
     """Advanced search engine with multiple ranking algorithms."""
 
     def __init__(self, document: str):
         self.document = document
-        self.words = self._tokenize(document)
+        self.words, self.word_char_positions = self._tokenize(document)
         self.word_positions = self._build_word_positions()
-
-    def _tokenize(self, text: str) -> list[str]:
-        """Tokenize text into words."""
-        return re.findall(r"\b\w+\b", text.lower())
-
-    def _build_word_positions(self) -> dict[str, list[int]]:
-        """Build a mapping of words to their positions in the document."""
+        self._vocabulary = None
+
+    def _tokenize(self, text: str) -> tuple[list[str], array]:
+        """Tokenize text into words, along with the character position where each word starts."""
+        words = []
+        char_positions = array("i")
+        for match in _TOKEN_RE.finditer(text.lower()):
+            words.append(match.group())
+            char_positions.append(match.start())
+        return words, char_positions
+
+    def _build_word_positions(self) -> dict[str, array]:
+        """Build a mapping of words to the character positions where they occur in the document."""
         positions = defaultdict(list)
-        for i, word in enumerate(self.words):
-            positions[word].append(i)
-        return positions
+        for word, char_pos in zip(self.words, self.word_char_positions):
+            positions[word].append(char_pos)
+        # Packed int arrays hold positions in 4 bytes each instead of a pointer to a boxed int
+        return {sys.intern(word): array("i", word_positions) for word, word_positions in positions.items()}
+
+    def _vocabulary_index(self) -> tuple[list[str], str, list[int], dict[str, int]]:
+        """Return the distinct words, joined by newlines for scanning, with each word's offset and index."""
+        if self._vocabulary is None:
+            words = list(self.word_positions)
+            starts = list(accumulate((len(word) + 1 for word in words[:-1]), initial=0))
+            self._vocabulary = (words, "\n".join(words), starts, {word: i for i, word in enumerate(words)})
+        return self._vocabulary
 
     def _get_text_around_position(self, position: int, context_chars: int = 100) -> tuple[str, int, int]:
         """Get text around a character position with specified context."""
@@ -53,119 +83,124 @@ class AdvancedSearchEngine:
         end = min(len(self.document), position + context_chars)
         return self.document[start:end], start, end
 
+    def _with_text(self, results: list[SearchResult], context_chars: int) -> list[SearchResult]:
+        """Fill in the text around each result, done only for the results that are returned."""
+        for result in results:
+            result.text, _, _ = self._get_text_around_position(result.position, context_chars)
+        return results
+
     def get_context_at_cursor(self, cursor: int, chars_before: int = 10000, chars_after: int = 10000) -> str:
         """Get context around a specific cursor position with custom before/after ranges."""
         start = max(0, cursor - chars_before)
         end = min(len(self.document), cursor + chars_after)
         return self.document[start:end]
 
-    def _word_position_to_char_position(self, word_pos: int) -> int:
-        """Convert word position to character position in original document."""
-        # This is an approximation - we'll find the word in the document
-        words_before = " ".join(self.words[:word_pos])
-        return len(words_before) + (1 if word_pos > 0 else 0)
-
     def boolean_search(self, keywords: list[str], max_results: int = 10, context_chars: int = 100) -> list[SearchResult]:
         """Search using boolean AND logic (all keywords must be present within proximity)."""
-        start_time = time.time()
+        start_time = time.perf_counter()
         keywords = [kw.lower() for kw in keywords]
         logger.debug(f"Boolean search started with {len(keywords)} keywords")
 
         # Find positions where all keywords appear within a window
         results = []
-        window_size = context_chars // 5  # Convert chars to approximate word window
+        window_size = context_chars  # Positions are character offsets, so the window is in characters
 
         if not keywords:
             return []
 
-        # Start with positions of the first keyword (least common first would be better)
-        base_keyword = keywords[0]
-        if base_keyword not in self.word_positions:
-            logger.debug(f"Base keyword '{base_keyword}' not found in document")
+        # Every keyword must appear, so a missing one means no results
+        missing = [kw for kw in keywords if kw not in self.word_positions]
+        if missing:
+            logger.debug(f"Keywords {missing} not found in document")
             return []
 
+        # Start with positions of the least common keyword, so the fewest windows are checked
+        base_keyword = min(keywords, key=lambda kw: len(self.word_positions[kw]))
+        other_keywords = [kw for kw in keywords if kw != base_keyword]
         base_positions = self.word_positions[base_keyword]
         logger.debug(f"Base keyword '{base_keyword}' has {len(base_positions)} positions")
 
-        # Optimization: limit positions for very common words
-        max_positions_to_check = 2000
-        if len(base_positions) > max_positions_to_check:
-            logger.info(f"Base keyword has {len(base_positions)} positions, sampling {max_positions_to_check}")
-            # Sample evenly across the document
-            step = len(base_positions) // max_positions_to_check
-            base_positions = base_positions[::step][:max_positions_to_check]
-
         checked_positions = 0
         for base_pos in base_positions:
             checked_positions += 1
             if checked_positions % 500 == 0:
                 logger.debug(f"Checked {checked_positions}/{len(base_positions)} positions...")
 
-            # Check if all other keywords appear within the window
-            matched_keywords = [base_keyword]
+            # Check if all other keywords appear within the window, stopping at the first that does not
             kw_positions = {base_keyword: [base_pos]}
 
-            for keyword in keywords[1:]:
-                if keyword in self.word_positions:
-                    nearby_positions = [p for p in self.word_positions[keyword] if abs(p - base_pos) <= window_size]
-                    if nearby_positions:
-                        matched_keywords.append(keyword)
-                        kw_positions[keyword] = nearby_positions
-
-            # Only include if all keywords are found
-            if len(matched_keywords) == len(keywords):
-                char_pos = self._word_position_to_char_position(base_pos)
-                context_text, _, _ = self._get_text_around_position(char_pos, context_chars)
+            for keyword in other_keywords:
+                # Positions are stored in ascending order, so the ones in the window are a contiguous slice
+                positions = self.word_positions[keyword]
+                lo = bisect_left(positions, base_pos - window_size)
+                nearby_positions = positions[lo : bisect_right(positions, base_pos + window_size, lo)]
+                if not nearby_positions:
+                    break
+                kw_positions[keyword] = nearby_positions
+            else:
+                # Only include if all keywords are found
+                matched_keywords = list(keywords)
 
                 # Score based on keyword proximity
                 score = len(matched_keywords) * 10  # Base score
 
-                # Bonus for keyword proximity
-                all_positions = []
-                for positions in kw_positions.values():
-                    all_positions.extend(positions)
-
-                if len(all_positions) > 1:
-                    position_range = max(all_positions) - min(all_positions)
-                    proximity_bonus = max(0, 50 - position_range)  # Closer keywords get higher score
+                # Bonus for keyword proximity; each keyword's positions are sorted, so only their ends matter
+                if len(kw_positions) > 1:
+                    pos_min = pos_max = base_pos
+                    for positions in kw_positions.values():
+                        pos_min = min(pos_min, positions[0])
+                        pos_max = max(pos_max, positions[-1])
+                    position_range = pos_max - pos_min
+                    proximity_bonus = max(0, 50 - position_range // 5)  # Closer keywords get higher score (~5 chars per word)
                     score += proximity_bonus
 
-                results.append(
-                    SearchResult(text=context_text, score=score, position=char_pos, matched_keywords=matched_keywords, keyword_positions=kw_positions)
-                )
+                results.append(SearchResult(text="", score=score, position=base_pos, matched_keywords=matched_keywords, keyword_positions=kw_positions))
 
                 # Early exit if we have plenty of results
                 if len(results) >= max_results * 2:
                     logger.debug(f"Early exit: found {len(results)} results")
                     break
 
-        # Remove duplicates and sort by score
-        seen_positions = set()
-        unique_results = []
-        for result in results:
-            if result.position not in seen_positions:
-                seen_positions.add(result.position)
-                unique_results.append(result)
-
-        unique_results.sort(key=lambda x: x.score, reverse=True)
+        # Sort by score; each base position is a distinct word start, so results are already unique
+        results.sort(key=lambda x: x.score, reverse=True)
 
-        elapsed = time.time() - start_time
-        logger.debug(f"Boolean search completed in {elapsed:.2f}s, found {len(unique_results)} unique results")
+        elapsed = time.perf_counter() - start_time
+        logger.debug(f"Boolean search completed in {elapsed:.2f}s, found {len(results)} unique results")
 
-        return unique_results[:max_results]
+        return self._with_text(results[:max_results], context_chars)
 
     def fuzzy_search(self, keywords: list[str], max_results: int = 10, context_chars: int = 100) -> list[SearchResult]:
         """Search using fuzzy matching (OR logic with partial matches)."""
         keywords = [kw.lower() for kw in keywords]
         results = []
 
-        # Find all words that partially match any keyword
+        # Find all words that partially match any keyword; only substantial keywords take part
+        repeats = Counter(kw for kw in keywords if len(kw) >= 3)
+        substantial = tuple(repeats)
+        hits = set()  # (word index, keyword index) pairs
+        if substantial:
+            distinct_words, vocabulary, starts, word_index = self._vocabulary_index()
+
+            # Keyword inside a word: one scan over the whole vocabulary instead of one check per word and keyword
+            for match in _keyword_pattern(substantial).finditer(vocabulary):
+                i = bisect_right(starts, match.start()) - 1
+                found = match.group(1)
+                hits.update((i, k) for k, keyword in enumerate(substantial) if keyword in found)
+
+            # Word inside a keyword: look up each substring of the keyword
+            for k, keyword in enumerate(substantial):
+                for start in range(len(keyword)):
+                    for end in range(start + 1, len(keyword) + 1):
+                        i = word_index.get(keyword[start:end])
+                        if i is not None:
+                            hits.add((i, k))
+
+        # Same order as checking each word in document order against each keyword in turn,
+        # since only the first few words per keyword are used
         matching_words = defaultdict(list)
-        for word in self.word_positions:
-            for keyword in keywords:
-                # Only match if keyword is substantial part of word
-                if len(keyword) >= 3 and (keyword in word or word in keyword):
-                    matching_words[keyword].append(word)
+        for i, k in sorted(hits):
+            keyword = substantial[k]
+            matching_words[keyword].extend([distinct_words[i]] * repeats[keyword])
 
         # Collect positions for matching words
         all_positions = set()
@@ -186,28 +221,23 @@ class AdvancedSearchEngine:
 
         # Score each position
         for pos in all_positions:
-            char_pos = self._word_position_to_char_position(pos)
-            context_text, _, _ = self._get_text_around_position(char_pos, context_chars)
-
             matched_keywords = []
             score = 0.0
             kw_positions = {}
 
             for keyword in keywords:
-                nearby_positions = [p for p in keyword_matches[keyword] if abs(p - pos) <= context_chars // 10]
+                nearby_positions = [p for p in keyword_matches[keyword] if abs(p - pos) <= context_chars // 2]
                 if nearby_positions:
                     matched_keywords.append(keyword)
                     kw_positions[keyword] = nearby_positions
                     score += len(nearby_positions)
 
             if matched_keywords:
-                results.append(
-                    SearchResult(text=context_text, score=score, position=char_pos, matched_keywords=matched_keywords, keyword_positions=kw_positions)
-                )
+                results.append(SearchResult(text="", score=score, position=pos, matched_keywords=matched_keywords, keyword_positions=kw_positions))
 
         # Sort by score and return top results
         results.sort(key=lambda x: x.score, reverse=True)
-        return results[:max_results]
+        return self._with_text(results[:max_results], context_chars)
 
 
 def format_search_results(results: list[SearchResult], keywords: list[str]) -> str:
@@ -2,9 +2,10 @@
 Task utilities for LongBench agent.
 """
 
-import json
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,8 +27,8 @@ def load_task_from_file(file_path):
     """
     logger.info(f"Loading task from {file_path}")
 
-    with open(file_path) as f:
-        task = json.load(f)
+    with open(file_path, "rb") as f:
+        task = orjson.loads(f.read())
 
     # Validate required fields
     required_fields = ["question", "context", "choices"]
@@ -46,7 +47,7 @@ def write_output(file_path, data):
     """Write the agent's output to a JSON file."""
     logger.info(f"Writing output to {file_path}")
 
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=2)
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
     logger.info("Output written successfully")
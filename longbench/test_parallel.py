@@ -4,6 +4,7 @@ Simple test script to verify parallel execution of the LongBench agent.
 """
 
 import asyncio
+import os
 import time
 
 from multi_agent.genes.seed_agents.longbench.simple_tool_calling.agent import solve_longbench_task
@@ -61,16 +62,20 @@ async def test_sequential():
     return results, total_time
 
 
-async def test_parallel():
-    """Test running tasks in parallel using asyncio.gather."""
-    print("Testing Parallel Execution (asyncio.gather)...")
+async def test_parallel(max_concurrency: int = min(10, (os.cpu_count() or 1) * 2)):
+    """Test running tasks in parallel using asyncio.gather, with at most max_concurrency running at once."""
+    print(f"Testing Parallel Execution (asyncio.gather, max concurrency {max_concurrency})...")
     start_time = time.time()
 
-    # Create all tasks
-    tasks = [run_single_task(task_data) for task_data in SAMPLE_TASKS]
+    # Bound the tasks in flight, so large batches don't all hit the API rate limits at once
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def guarded(task_data: dict) -> dict:
+        async with semaphore:
+            return await run_single_task(task_data)
 
     # Run all tasks in parallel
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    results = await asyncio.gather(*map(guarded, SAMPLE_TASKS), return_exceptions=True)
 
     # Process results
     processed_results = []